@@ -0,0 +1,135 @@
+"""
+Convert circuit maps to .glb, one process per circuit.
+
+    python scripts/circuit_map.py                                # all circuits, contour strategy
+    python scripts/circuit_map.py --strategy contour --circuit VIR
+    python scripts/circuit_map.py --pdf                          # render source/pdfs first
+    python scripts/circuit_map.py path/to/Some_Map.png           # any image or PDF
+
+Strategies:
+    colour-segment  sector colours traced one by one (segment_converter), line strip
+    contour         track outline or colour contours (contour_converter), line strip
+    skeleton        skeleton of the coloured and thick dark lines (improved_converter), tube mesh
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+IMAGES = ROOT / 'source' / 'images'
+PDFS = ROOT / 'source' / 'pdfs'
+OUTPUT = ROOT / 'output'
+
+# Circuit name -> file stem of its map in source/images and source/pdfs
+CIRCUITS = {
+    'Barber': 'Barber_Circuit_Map',
+    'COTA': 'COTA_Circuit_Map',
+    'Indy': 'Indy_Circuit_Map',
+    'Road-America': 'Road_America_Map',
+    'Sebring': 'Sebring_Track_Sector_Map',
+    'Sonoma': 'Sonoma_Map',
+    'VIR': 'VIR_map',
+}
+
+STRATEGIES = ('colour-segment', 'contour', 'skeleton')
+
+def circuit_name(path):
+    """Circuit name of a map file: the known name for its stem, else the stem with dashes"""
+    stem = Path(path).stem
+    for name, known in CIRCUITS.items():
+        if known == stem:
+            return name
+    return stem.replace('_Map', '').replace('_', '-')
+
+def extract(strategy, name, image_path):
+    """3D path points of one circuit and the function that writes them"""
+    from glb_export import create_gltf_line
+    if strategy == 'colour-segment':
+        import segment_converter
+        return segment_converter.extract_circuit(image_path), create_gltf_line
+    if strategy == 'contour':
+        import contour_converter
+        # Outlined maps are traced on their black track line; the rest on their colours
+        detect_black = contour_converter.circuits.get(name, (None, True))[1]
+        return contour_converter.extract_centerline_from_contours(image_path, detect_black), create_gltf_line
+    if strategy == 'skeleton':
+        import improved_converter
+        return improved_converter.extract_circuit_path(image_path), improved_converter.create_gltf
+    raise ValueError(f"Unknown strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
+
+def build_circuit(source, strategy='contour', output_dir=OUTPUT, name=None):
+    """Convert one map (PNG, or PDF rendered to a PNG in source/images) to output_dir/<name>.glb.
+
+    Returns (name, path points, seconds). Raises if no path is found.
+    """
+    start = time.perf_counter()
+    source = Path(source)
+    name = name or circuit_name(source)
+
+    if source.suffix.lower() == '.pdf':
+        from extract_pdfs import render_pdf
+        image_path = IMAGES / f"{source.stem}.png"
+        render_pdf(source, str(image_path))
+        source = image_path
+    if not source.exists():
+        raise FileNotFoundError(f"{source} not found")
+
+    path_points, write = extract(strategy, name, source)
+    if len(path_points) < 2:
+        raise ValueError(f"no path found in {source.name}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write(path_points, output_dir / f"{name}.glb", name)
+    return name, len(path_points), time.perf_counter() - start
+
+def _report(source, build):
+    """Print how building one circuit went; True if it worked"""
+    try:
+        name, count, seconds = build()
+        print(f"✓ {name}: {count} points in {seconds:.1f}s")
+        return True
+    except Exception as e:
+        print(f"✗ {circuit_name(source)}: {e}")
+        return False
+
+def build_all(sources, strategy='contour', output_dir=OUTPUT, workers=None):
+    """Convert every map, in a process pool unless there is one map or one worker.
+
+    Returns the names of the circuits that failed.
+    """
+    if len(sources) == 1 or workers == 1:
+        return [circuit_name(source) for source in sources
+                if not _report(source, lambda: build_circuit(source, strategy, output_dir))]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_circuit, source, strategy, output_dir): source for source in sources}
+        return [circuit_name(futures[future]) for future in as_completed(futures)
+                if not _report(futures[future], future.result)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert circuit maps to .glb track models")
+    parser.add_argument('sources', nargs='*', help="map images or PDFs (default: the known circuits)")
+    parser.add_argument('--circuit', action='append', choices=sorted(CIRCUITS),
+                        help="only this known circuit (repeatable)")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='contour')
+    parser.add_argument('--pdf', action='store_true', help="render the known circuits from source/pdfs")
+    parser.add_argument('--output', type=Path, default=OUTPUT, help="output directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="parallel processes")
+    args = parser.parse_args(argv)
+
+    sources = [Path(s) for s in args.sources]
+    if not sources:
+        folder, suffix = (PDFS, '.pdf') if args.pdf else (IMAGES, '.png')
+        sources = [folder / f"{CIRCUITS[name]}{suffix}" for name in (args.circuit or CIRCUITS)]
+
+    start = time.perf_counter()
+    failed = build_all(sources, args.strategy, args.output, args.workers)
+
+    print(f"\n{len(sources) - len(failed)}/{len(sources)} circuits in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,9 +1,11 @@
 import cv2
 import numpy as np
-import json
 from pathlib import Path
-from scipy import ndimage
 from skimage import morphology
+from path_simplify import simplify
+from skeleton_path import order_path
+from mesh_builder import is_loop, tube_mesh
+from glb_export import write_glb
 
 def extract_path_from_image(image_path):
     img = cv2.imread(str(image_path))
@@ -28,31 +30,13 @@ def extract_path_from_image(image_path):
     if len(points) == 0:
         return []
     
-    # Sort points to create a path
-    ordered = [points[0]]
-    remaining = list(points[1:])
+    # Order points into a path (gaps up to MAX_GAP_PX bridged, stray pieces left out)
+    ordered = points[order_path(points)]
     
-    while remaining and len(ordered) < len(points):
-        last = ordered[-1]
-        distances = [np.linalg.norm(last - p) for p in remaining]
-        if not distances:
-            break
-        nearest_idx = np.argmin(distances)
-        if distances[nearest_idx] < 50:  # Max gap threshold
-            ordered.append(remaining.pop(nearest_idx))
-        else:
-            break
-    
-    # Simplify path (reduce points)
-    ordered = np.array(ordered)
-    simplified = [ordered[0]]
-    for i in range(1, len(ordered) - 1):
-        if i % 10 == 0:  # Keep every 10th point
-            simplified.append(ordered[i])
-    simplified.append(ordered[-1])
+    # Simplify path (within TOLERANCE_PX of the traced path)
+    simplified = ordered[simplify(ordered)]
     
     # Normalize coordinates (flip Y, center, scale)
-    simplified = np.array(simplified)
     h, w = img.shape[:2]
     normalized = simplified.copy().astype(float)
     normalized[:, 0] = (normalized[:, 0] - h/2) / h * 100  # Scale to ~100 units
@@ -64,106 +48,30 @@ def extract_path_from_image(image_path):
     return path_3d
 
 def create_gltf(path_points, output_path, track_name):
-    vertices = []
-    indices = []
-    
-    # Create tube geometry along path
-    radius = 2.0
-    segments = 8
-    
-    for i, point in enumerate(path_points):
-        for j in range(segments):
-            angle = (j / segments) * 2 * np.pi
-            x = point[0] + radius * np.cos(angle)
-            y = point[1] + radius * np.sin(angle)
-            z = point[2]
-            vertices.extend([x, y, z])
-    
-    # Create indices for triangles
-    for i in range(len(path_points) - 1):
-        for j in range(segments):
-            next_j = (j + 1) % segments
-            
-            a = i * segments + j
-            b = i * segments + next_j
-            c = (i + 1) * segments + j
-            d = (i + 1) * segments + next_j
-            
-            indices.extend([a, b, c, b, d, c])
+    # Create tube geometry along path, closed into a loop if the endpoints are close
+    closed = is_loop(path_points, gap=10)
+    vertices, indices = tube_mesh(path_points, radius=2.0, segments=8, closed=closed)
     
-    # Create GLTF structure
-    gltf = {
-        "asset": {"version": "2.0", "generator": "Circuit Converter"},
-        "scene": 0,
-        "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0, "name": track_name}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {"POSITION": 0},
-                "indices": 1,
-                "mode": 4
-            }]
-        }],
-        "accessors": [
-            {
-                "bufferView": 0,
-                "componentType": 5126,
-                "count": len(vertices) // 3,
-                "type": "VEC3",
-                "max": [max(vertices[0::3]), max(vertices[1::3]), max(vertices[2::3])],
-                "min": [min(vertices[0::3]), min(vertices[1::3]), min(vertices[2::3])]
-            },
-            {
-                "bufferView": 1,
-                "componentType": 5123,
-                "count": len(indices),
-                "type": "SCALAR"
-            }
-        ],
-        "bufferViews": [
-            {
-                "buffer": 0,
-                "byteOffset": 0,
-                "byteLength": len(vertices) * 4
-            },
-            {
-                "buffer": 0,
-                "byteOffset": len(vertices) * 4,
-                "byteLength": len(indices) * 2
-            }
-        ],
-        "buffers": [{
-            "byteLength": len(vertices) * 4 + len(indices) * 2,
-            "uri": f"{track_name}.bin"
-        }]
-    }
+    # Write a single binary glTF (quantized positions, cache-ordered triangles)
+    data = write_glb(vertices, indices, output_path, track_name, generator="Circuit Converter")
     
-    # Write GLTF
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=2)
-    
-    # Write binary buffer
-    bin_path = output_path.with_suffix('.bin')
-    with open(bin_path, 'wb') as f:
-        f.write(np.array(vertices, dtype=np.float32).tobytes())
-        f.write(np.array(indices, dtype=np.uint16).tobytes())
-    
-    print(f"Created {output_path}")
+    print(f"Created {output_path} ({len(data)} bytes)")
 
-# Process all PNG files
-png_files = list(Path('.').glob('*_Map.png'))
+if __name__ == '__main__':
+    # Process all PNG files
+    png_files = list(Path('.').glob('*_Map.png'))
 
-for png_file in png_files:
-    print(f"\nProcessing {png_file}...")
-    track_name = png_file.stem.replace('_Map', '').replace('_', '-')
-    
-    path_points = extract_path_from_image(png_file)
-    
-    if path_points:
-        output_gltf = Path(f"{track_name}.gltf")
-        create_gltf(path_points, output_gltf, track_name)
-        print(f"✓ Generated {len(path_points)} path points")
-    else:
-        print(f"✗ Could not extract path")
+    for png_file in png_files:
+        print(f"\nProcessing {png_file}...")
+        track_name = png_file.stem.replace('_Map', '').replace('_', '-')
+        
+        path_points = extract_path_from_image(png_file)
+        
+        if path_points:
+            output_gltf = Path(f"{track_name}.glb")
+            create_gltf(path_points, output_gltf, track_name)
+            print(f"✓ Generated {len(path_points)} path points")
+        else:
+            print(f"✗ Could not extract path")
 
-print("\n✓ All circuits converted!")
+    print("\n✓ All circuits converted!")
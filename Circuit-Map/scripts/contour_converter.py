@@ -1,8 +1,7 @@
 import cv2
 import numpy as np
-import json
 from pathlib import Path
-from scipy.interpolate import splprep, splev
+from glb_export import create_gltf_line
 
 def extract_centerline_from_contours(image_path, detect_black=False):
     img = cv2.imread(str(image_path))
@@ -86,63 +85,6 @@ def extract_centerline_from_contours(image_path, detect_black=False):
     
     return path_3d
 
-def create_gltf_line(path_points, output_path, track_name):
-    if len(path_points) < 2:
-        return
-    
-    vertices = []
-    for p in path_points:
-        vertices.extend(p)
-    
-    indices = list(range(len(path_points)))
-    
-    gltf = {
-        "asset": {"version": "2.0"},
-        "scene": 0,
-        "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0, "name": track_name}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {"POSITION": 0},
-                "indices": 1,
-                "mode": 3
-            }]
-        }],
-        "accessors": [
-            {
-                "bufferView": 0,
-                "componentType": 5126,
-                "count": len(path_points),
-                "type": "VEC3",
-                "max": [max(vertices[0::3]), max(vertices[1::3]), max(vertices[2::3])],
-                "min": [min(vertices[0::3]), min(vertices[1::3]), min(vertices[2::3])]
-            },
-            {
-                "bufferView": 1,
-                "componentType": 5123,
-                "count": len(indices),
-                "type": "SCALAR"
-            }
-        ],
-        "bufferViews": [
-            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertices) * 4},
-            {"buffer": 0, "byteOffset": len(vertices) * 4, "byteLength": len(indices) * 2}
-        ],
-        "buffers": [{
-            "byteLength": len(vertices) * 4 + len(indices) * 2,
-            "uri": f"{track_name}.bin"
-        }]
-    }
-    
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=2)
-    
-    with open(output_path.with_suffix('.bin'), 'wb') as f:
-        f.write(np.array(vertices, dtype=np.float32).tobytes())
-        f.write(np.array(indices, dtype=np.uint16).tobytes())
-    
-    print(f"✓ {track_name}: {len(path_points)} points")
-
 circuits = {
     'Barber': ('source/images/Barber_Circuit_Map.png', False),
     'COTA': ('source/images/COTA_Circuit_Map.png', True),
@@ -153,10 +95,11 @@ circuits = {
     'VIR': ('source/images/VIR_map.png', True)
 }
 
-for name, (img_path, detect_black) in circuits.items():
-    print(f"\nProcessing {name}...")
-    path_points = extract_centerline_from_contours(img_path, detect_black)
-    if path_points:
-        create_gltf_line(path_points, Path(f'output/{name}.gltf'), name)
-    else:
-        print(f"✗ Failed")
+if __name__ == '__main__':
+    for name, (img_path, detect_black) in circuits.items():
+        print(f"\nProcessing {name}...")
+        path_points = extract_centerline_from_contours(img_path, detect_black)
+        if path_points:
+            create_gltf_line(path_points, Path(f'output/{name}.glb'), name)
+        else:
+            print(f"✗ Failed")
@@ -15,25 +15,28 @@ except ImportError:
     has_pymupdf = False
 
 if not has_pdf2image and not has_pymupdf:
-    print("Installing PyMuPDF...")
-    os.system("pip install PyMuPDF")
-    import fitz
-    has_pymupdf = True
-
-pdf_files = list(Path('.').glob('*.pdf'))
+    raise ImportError("Rendering PDFs needs PyMuPDF or pdf2image: pip install PyMuPDF")
 
-for pdf_file in pdf_files:
-    output_name = pdf_file.stem + '.png'
-    print(f"Extracting {pdf_file} -> {output_name}")
-    
+def render_pdf(pdf_file, output_name, dpi=300):
+    """Render the first page of a PDF to a PNG (written atomically)"""
+    tmp_name = f"{output_name}.{os.getpid()}.tmp"
     if has_pymupdf:
         doc = fitz.open(pdf_file)
         page = doc[0]
-        pix = page.get_pixmap(dpi=300)
-        pix.save(output_name)
+        pix = page.get_pixmap(dpi=dpi)
+        pix.save(tmp_name, output='png')
         doc.close()
     elif has_pdf2image:
-        images = convert_from_path(pdf_file, dpi=300)
-        images[0].save(output_name, 'PNG')
+        images = convert_from_path(pdf_file, dpi=dpi)
+        images[0].save(tmp_name, 'PNG')
+    os.replace(tmp_name, output_name)
 
-print("Done extracting images!")
+if __name__ == '__main__':
+    pdf_files = list(Path('.').glob('*.pdf'))
+    
+    for pdf_file in pdf_files:
+        output_name = pdf_file.stem + '.png'
+        print(f"Extracting {pdf_file} -> {output_name}")
+        render_pdf(pdf_file, output_name)
+    
+    print("Done extracting images!")
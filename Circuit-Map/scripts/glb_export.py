@@ -0,0 +1,193 @@
+import gzip
+import json
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from mesh_builder import FLOAT, INDEX_COMPONENT_TYPES, index_array
+
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+JSON_CHUNK = b'JSON'
+BIN_CHUNK = b'BIN\x00'
+SHORT = 5122
+LINE_STRIP = 3
+TRIANGLES = 4
+
+def reorder_mesh(vertices, indices):
+    """Reorder a triangle list for the GPU caches, as meshoptimizer does in spirit.
+
+    Triangles are sorted by their lowest vertex so neighbours are drawn
+    together (vertex cache); vertices are then renumbered in order of first
+    use (vertex fetch). Winding is kept. Also makes the buffers compress better.
+    """
+    vertices = np.asarray(vertices)
+    triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    triangles = triangles[np.argsort(triangles.min(axis=1), kind='stable')]
+
+    used, first = np.unique(triangles, return_index=True)
+    order = used[np.argsort(first)]
+    remap = np.zeros(len(vertices), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return vertices[order], remap[triangles].reshape(-1)
+
+def quantize_positions(vertices):
+    """int16 positions for KHR_mesh_quantization: (quantized (N, 4), per-axis scale).
+
+    Quantized around the origin so dequantizing is a node scale alone; the
+    viewers move the node, which must not shift the geometry. The fourth
+    component pads each vertex to 8 bytes (attributes are 4-byte aligned).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    extent = np.abs(vertices).max(axis=0) if len(vertices) else np.zeros(3)
+    scale = np.where(extent > 0, extent / 32767, 1.0)
+    quantized = np.zeros((len(vertices), 4), dtype=np.int16)
+    quantized[:, :3] = np.round(vertices / scale)
+    return quantized, scale
+
+def _pad(raw, fill):
+    return raw + fill * (-len(raw) % 4)
+
+def glb_bytes(vertices, indices, track_name, mode=TRIANGLES, quantize=True, reorder=True, generator=None):
+    """A self-contained binary glTF (.glb) of one indexed mesh"""
+    vertices = np.asarray(vertices, dtype=np.float32)
+    if reorder and mode == TRIANGLES:
+        vertices, indices = reorder_mesh(vertices, indices)
+    indices = index_array(indices, len(vertices))
+
+    node = {"mesh": 0, "name": track_name}
+    if quantize:
+        positions, scale = quantize_positions(vertices)
+        node["scale"] = scale.tolist()
+        position_accessor = {"componentType": SHORT, "max": positions[:, :3].max(axis=0).tolist(),
+                             "min": positions[:, :3].min(axis=0).tolist()}
+        position_view = {"byteStride": 8}
+    else:
+        positions = vertices
+        position_accessor = {"componentType": FLOAT, "max": vertices.max(axis=0).tolist(),
+                             "min": vertices.min(axis=0).tolist()}
+        position_view = {}
+
+    asset = {"version": "2.0"}
+    if generator:
+        asset["generator"] = generator
+    gltf = {
+        "asset": asset,
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [node],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1, "mode": mode}]}],
+        "accessors": [
+            {"bufferView": 0, "count": len(vertices), "type": "VEC3", **position_accessor},
+            {"bufferView": 1, "componentType": INDEX_COMPONENT_TYPES[indices.dtype],
+             "count": len(indices), "type": "SCALAR"}
+        ],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": positions.nbytes, **position_view},
+            {"buffer": 0, "byteOffset": positions.nbytes, "byteLength": indices.nbytes}
+        ],
+        "buffers": [{"byteLength": positions.nbytes + indices.nbytes}]
+    }
+    if quantize:
+        gltf["extensionsUsed"] = ["KHR_mesh_quantization"]
+        gltf["extensionsRequired"] = ["KHR_mesh_quantization"]
+
+    json_chunk = _pad(json.dumps(gltf, separators=(',', ':')).encode('utf-8'), b' ')
+    bin_chunk = _pad(positions.tobytes() + indices.tobytes(), b'\x00')
+    length = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    return b''.join([
+        struct.pack('<4sII', GLB_MAGIC, GLB_VERSION, length),
+        struct.pack('<I4s', len(json_chunk), JSON_CHUNK), json_chunk,
+        struct.pack('<I4s', len(bin_chunk), BIN_CHUNK), bin_chunk,
+    ])
+
+def write_glb(vertices, indices, output_path, track_name, mode=TRIANGLES, quantize=True,
+              reorder=True, generator=None):
+    """Write an indexed mesh as a single .glb file (atomically); returns the bytes written"""
+    data = glb_bytes(vertices, indices, track_name, mode, quantize, reorder, generator)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+    return data
+
+def create_gltf_line(path_points, output_path, track_name):
+    """Write a path as a line strip through its points, in order (nothing for fewer than two)"""
+    if len(path_points) < 2:
+        return
+    
+    data = write_glb(path_points, np.arange(len(path_points)), output_path, track_name, mode=LINE_STRIP)
+    
+    print(f"✓ {track_name}: {len(path_points)} points, {len(data)} bytes")
+
+def read_glb(data):
+    """Decode .glb bytes written by glb_bytes: (vertices (N, 3) float32, indices, mode)"""
+    magic, version, _ = struct.unpack_from('<4sII', data, 0)
+    if magic != GLB_MAGIC or version != GLB_VERSION:
+        raise ValueError("not a glTF 2.0 binary")
+    json_length, _ = struct.unpack_from('<I4s', data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    binary = memoryview(data)[20 + json_length + 8:]
+
+    primitive = gltf["meshes"][0]["primitives"][0]
+    position = gltf["accessors"][primitive["attributes"]["POSITION"]]
+    view = gltf["bufferViews"][position["bufferView"]]
+    if position["componentType"] == SHORT:
+        stride = view.get("byteStride", 6) // 2
+        raw = np.frombuffer(binary, dtype='<i2', count=position["count"] * stride, offset=view["byteOffset"])
+        scale = np.asarray(gltf["nodes"][0].get("scale", [1.0, 1.0, 1.0]), dtype=np.float32)
+        vertices = raw.reshape(-1, stride)[:, :3] * scale
+    else:
+        vertices = np.frombuffer(binary, dtype='<f4', count=position["count"] * 3,
+                                 offset=view["byteOffset"]).reshape(-1, 3)
+
+    accessor = gltf["accessors"][primitive["indices"]]
+    dtype = {5123: '<u2', 5125: '<u4'}[accessor["componentType"]]
+    offset = gltf["bufferViews"][accessor["bufferView"]]["byteOffset"]
+    indices = np.frombuffer(binary, dtype=dtype, count=accessor["count"], offset=offset)
+    return vertices, indices, primitive.get("mode", TRIANGLES)
+
+def size_report(name, data, before=None, repeats=20):
+    """One line: .glb size raw and gzipped (vs. the .gltf + .bin it replaces) and decode time"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        read_glb(data)
+    decode_ms = (time.perf_counter() - start) / repeats * 1000
+
+    line = f"{name}: {len(data)} B, {len(gzip.compress(data))} B gzipped, decode {decode_ms:.2f} ms"
+    if before:
+        line += f" (was {len(before)} B, {len(gzip.compress(before))} B gzipped, 2 files)"
+    return line
+
+def gltf_to_glb(gltf_path, quantize=True, reorder=True):
+    """Pack an existing .gltf + .bin pair (as the converters used to write) into a .glb next to it"""
+    gltf_path = Path(gltf_path)
+    gltf = json.loads(gltf_path.read_text())
+    binary = (gltf_path.parent / gltf["buffers"][0]["uri"]).read_bytes()
+
+    primitive = gltf["meshes"][0]["primitives"][0]
+    position = gltf["accessors"][primitive["attributes"]["POSITION"]]
+    vertices = np.frombuffer(binary, dtype='<f4', count=position["count"] * 3,
+                             offset=gltf["bufferViews"][position["bufferView"]]["byteOffset"]).reshape(-1, 3)
+    accessor = gltf["accessors"][primitive["indices"]]
+    dtype = {5123: '<u2', 5125: '<u4'}[accessor["componentType"]]
+    indices = np.frombuffer(binary, dtype=dtype, count=accessor["count"],
+                            offset=gltf["bufferViews"][accessor["bufferView"]]["byteOffset"])
+
+    data = write_glb(vertices, indices, gltf_path.with_suffix('.glb'), gltf["nodes"][0].get("name", gltf_path.stem),
+                     mode=primitive.get("mode", TRIANGLES), quantize=quantize, reorder=reorder,
+                     generator=gltf["asset"].get("generator"))
+    return data, gltf_path.read_bytes() + binary
+
+if __name__ == '__main__':
+    # python scripts/glb_export.py [--no-quantize] output/*.gltf
+    args = sys.argv[1:]
+    quantize = '--no-quantize' not in args
+    paths = [a for a in args if not a.startswith('--')] or sorted(Path('output').glob('*.gltf'))
+    for path in paths:
+        data, before = gltf_to_glb(path, quantize=quantize)
+        print(size_report(Path(path).stem, data, before))
@@ -1,9 +1,17 @@
 import cv2
 import numpy as np
-import json
 from pathlib import Path
-from scipy import ndimage
 from skimage import morphology
+from path_simplify import simplify
+from skeleton_path import trace_centerline
+from mesh_builder import is_loop, tube_mesh
+from glb_export import write_glb
+
+# Track line: darker than DARK_LEVEL, at least MIN_STROKE_PX wide (text is thinner);
+# breaks in it up to MAX_BREAK_PX long are closed
+DARK_LEVEL = 128
+MIN_STROKE_PX = 5
+MAX_BREAK_PX = 41
 
 def extract_circuit_path(image_path):
     img = cv2.imread(str(image_path))
@@ -14,10 +22,17 @@ def extract_circuit_path(image_path):
     upper = np.array([180, 255, 255])
     mask = cv2.inRange(hsv, lower, upper)
     
-    # Clean up
-    kernel = np.ones((5,5), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    mask = cv2.dilate(mask, kernel, iterations=2)
+    # Most maps draw the track as a thick black line: keep dark strokes wider
+    # than text and table rules
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, dark = cv2.threshold(gray, DARK_LEVEL, 255, cv2.THRESH_BINARY_INV)
+    dark = cv2.morphologyEx(dark, cv2.MORPH_OPEN,
+                            cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (MIN_STROKE_PX, MIN_STROKE_PX)))
+    mask = mask | dark
+    
+    # Close the sector breaks and labels drawn across the track
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE,
+                            cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (MAX_BREAK_PX, MAX_BREAK_PX)))
     
     # Get skeleton
     skeleton = morphology.skeletonize(mask > 0)
@@ -28,52 +43,12 @@ def extract_circuit_path(image_path):
     if len(points) == 0:
         return []
     
-    # Build adjacency graph
-    from scipy.spatial import cKDTree
-    tree = cKDTree(points)
-    
-    # Find all points within distance 2 (8-connected)
-    pairs = tree.query_pairs(r=2.0)
-    
-    # Build adjacency list
-    adj = {i: [] for i in range(len(points))}
-    for i, j in pairs:
-        adj[i].append(j)
-        adj[j].append(i)
-    
-    # Find endpoint or start from any point
-    start_idx = 0
-    for i, neighbors in adj.items():
-        if len(neighbors) == 1:  # Endpoint
-            start_idx = i
-            break
-    
-    # Traverse the path
-    visited = set()
-    path = []
-    current = start_idx
-    
-    while current is not None:
-        visited.add(current)
-        path.append(points[current])
-        
-        # Find next unvisited neighbor
-        next_node = None
-        for neighbor in adj[current]:
-            if neighbor not in visited:
-                next_node = neighbor
-                break
-        
-        current = next_node
+    # Ordered centerline: spurs pruned, the circuit loop (or longest path) kept
+    order, closed = trace_centerline(points)
+    path = points[order]
     
-    # If path is too short, try all connected components
-    if len(path) < len(points) * 0.5:
-        # Just use all points sorted by position
-        path = points[np.argsort(points[:, 0])]
-    
-    # Simplify - keep every Nth point
-    step = max(1, len(path) // 200)  # Target ~200 points
-    simplified = path[::step]
+    # Simplify (within TOLERANCE_PX of the traced path)
+    simplified = path[simplify(path, closed=closed)]
     
     # Normalize to 3D coordinates
     h, w = img.shape[:2]
@@ -92,92 +67,12 @@ def create_gltf(path_points, output_path, track_name):
         print(f"Not enough points for {track_name}")
         return
     
-    vertices = []
-    indices = []
-    radius = 3.0
-    segments = 8
-    
-    # Create tube geometry
-    for i, point in enumerate(path_points):
-        for j in range(segments):
-            angle = (j / segments) * 2 * np.pi
-            x = point[0]
-            y = point[1] + radius * np.cos(angle)
-            z = point[2] + radius * np.sin(angle)
-            vertices.extend([x, y, z])
-    
-    # Create triangles
-    for i in range(len(path_points) - 1):
-        for j in range(segments):
-            next_j = (j + 1) % segments
-            
-            a = i * segments + j
-            b = i * segments + next_j
-            c = (i + 1) * segments + j
-            d = (i + 1) * segments + next_j
-            
-            indices.extend([a, b, c, b, d, c])
-    
-    # Close the loop if endpoints are close
-    if len(path_points) > 10:
-        dist = np.linalg.norm(np.array(path_points[0]) - np.array(path_points[-1]))
-        if dist < 20:
-            i = len(path_points) - 1
-            for j in range(segments):
-                next_j = (j + 1) % segments
-                a = i * segments + j
-                b = i * segments + next_j
-                c = j
-                d = next_j
-                indices.extend([a, b, c, b, d, c])
-    
-    gltf = {
-        "asset": {"version": "2.0"},
-        "scene": 0,
-        "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0, "name": track_name}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {"POSITION": 0},
-                "indices": 1,
-                "mode": 4
-            }]
-        }],
-        "accessors": [
-            {
-                "bufferView": 0,
-                "componentType": 5126,
-                "count": len(vertices) // 3,
-                "type": "VEC3",
-                "max": [max(vertices[0::3]), max(vertices[1::3]), max(vertices[2::3])],
-                "min": [min(vertices[0::3]), min(vertices[1::3]), min(vertices[2::3])]
-            },
-            {
-                "bufferView": 1,
-                "componentType": 5123,
-                "count": len(indices),
-                "type": "SCALAR"
-            }
-        ],
-        "bufferViews": [
-            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertices) * 4},
-            {"buffer": 0, "byteOffset": len(vertices) * 4, "byteLength": len(indices) * 2}
-        ],
-        "buffers": [{
-            "byteLength": len(vertices) * 4 + len(indices) * 2,
-            "uri": f"{track_name}.bin"
-        }]
-    }
-    
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=2)
-    
-    bin_path = output_path.with_suffix('.bin')
-    with open(bin_path, 'wb') as f:
-        f.write(np.array(vertices, dtype=np.float32).tobytes())
-        f.write(np.array(indices, dtype=np.uint16).tobytes())
+    # Tube geometry, closed into a loop if the endpoints are close
+    closed = len(path_points) > 10 and is_loop(path_points, gap=20)
+    vertices, indices = tube_mesh(path_points, radius=3.0, segments=8, closed=closed)
+    data = write_glb(vertices, indices, output_path, track_name)
     
-    print(f"✓ {track_name}: {len(path_points)} points")
+    print(f"✓ {track_name}: {len(path_points)} points, {len(data)} bytes")
 
 # Process all images
 circuits = {
@@ -190,10 +85,11 @@ circuits = {
     'VIR': 'source/images/VIR_map.png'
 }
 
-for name, img_path in circuits.items():
-    print(f"\nProcessing {name}...")
-    path_points = extract_circuit_path(img_path)
-    if path_points:
-        create_gltf(path_points, Path(f'output/{name}.gltf'), name)
-    else:
-        print(f"✗ Failed to extract path")
+if __name__ == '__main__':
+    for name, img_path in circuits.items():
+        print(f"\nProcessing {name}...")
+        path_points = extract_circuit_path(img_path)
+        if path_points:
+            create_gltf(path_points, Path(f'output/{name}.glb'), name)
+        else:
+            print(f"✗ Failed to extract path")
@@ -1,9 +1,10 @@
 import cv2
 import numpy as np
-import json
 from pathlib import Path
 from skimage import morphology
-from scipy.spatial import cKDTree
+from path_simplify import simplify
+from skeleton_path import trace_centerline
+from glb_export import create_gltf_line
 
 def extract_and_order_segment(mask, reverse=False):
     """Extract points from segment and order them"""
@@ -13,43 +14,14 @@ def extract_and_order_segment(mask, reverse=False):
     if len(points) < 2:
         return []
     
-    # Build graph
-    tree = cKDTree(points)
-    pairs = tree.query_pairs(r=2.0)
-    
-    adj = {i: [] for i in range(len(points))}
-    for i, j in pairs:
-        adj[i].append(j)
-        adj[j].append(i)
-    
-    # Find endpoints
-    endpoints = [i for i, neighbors in adj.items() if len(neighbors) == 1]
-    
-    if not endpoints:
-        start_idx = 0
-    else:
-        start_idx = endpoints[0]
-    
-    # Traverse
-    visited = set()
-    path = []
-    current = start_idx
-    
-    while current is not None:
-        visited.add(current)
-        path.append(points[current])
-        
-        next_node = None
-        for neighbor in adj[current]:
-            if neighbor not in visited:
-                next_node = neighbor
-                break
-        current = next_node
+    # Longest spur-free path through the skeleton
+    order, _ = trace_centerline(points)
+    path = points[order]
     
     if reverse:
         path = path[::-1]
     
-    return np.array(path) if path else np.array([])
+    return path
 
 def extract_barber_circuit(image_path):
     """Manually order Barber segments correctly"""
@@ -133,9 +105,8 @@ def extract_barber_circuit(image_path):
     
     connected = np.array(connected)
     
-    # Simplify
-    step = max(1, len(connected) // 300)
-    simplified = connected[::step]
+    # Simplify (within TOLERANCE_PX of the traced path)
+    simplified = connected[simplify(connected)]
     
     # Add closing point
     if len(simplified) > 10:
@@ -153,66 +124,10 @@ def extract_barber_circuit(image_path):
     
     return path_3d
 
-def create_gltf_line(path_points, output_path, track_name):
-    if len(path_points) < 2:
-        return
-    
-    vertices = []
-    for p in path_points:
-        vertices.extend(p)
-    
-    indices = list(range(len(path_points)))
-    
-    gltf = {
-        "asset": {"version": "2.0"},
-        "scene": 0,
-        "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0, "name": track_name}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {"POSITION": 0},
-                "indices": 1,
-                "mode": 3
-            }]
-        }],
-        "accessors": [
-            {
-                "bufferView": 0,
-                "componentType": 5126,
-                "count": len(path_points),
-                "type": "VEC3",
-                "max": [max(vertices[0::3]), max(vertices[1::3]), max(vertices[2::3])],
-                "min": [min(vertices[0::3]), min(vertices[1::3]), min(vertices[2::3])]
-            },
-            {
-                "bufferView": 1,
-                "componentType": 5123,
-                "count": len(indices),
-                "type": "SCALAR"
-            }
-        ],
-        "bufferViews": [
-            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertices) * 4},
-            {"buffer": 0, "byteOffset": len(vertices) * 4, "byteLength": len(indices) * 2}
-        ],
-        "buffers": [{
-            "byteLength": len(vertices) * 4 + len(indices) * 2,
-            "uri": f"{track_name}.bin"
-        }]
-    }
-    
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=2)
-    
-    with open(output_path.with_suffix('.bin'), 'wb') as f:
-        f.write(np.array(vertices, dtype=np.float32).tobytes())
-        f.write(np.array(indices, dtype=np.uint16).tobytes())
-    
-    print(f"✓ {track_name}: {len(path_points)} points")
-
-print("\nProcessing Barber...")
-path_points = extract_barber_circuit('source/images/Barber_Circuit_Map.png')
-if path_points:
-    create_gltf_line(path_points, Path('output/Barber.gltf'), 'Barber')
-else:
-    print("✗ Failed")
+if __name__ == '__main__':
+    print("\nProcessing Barber...")
+    path_points = extract_barber_circuit('source/images/Barber_Circuit_Map.png')
+    if path_points:
+        create_gltf_line(path_points, Path('output/Barber.glb'), 'Barber')
+    else:
+        print("✗ Failed")
@@ -0,0 +1,99 @@
+import numpy as np
+
+# World up (glTF is y-up); frames keep their side vector horizontal where they can
+UP = np.array([0.0, 1.0, 0.0])
+
+# glTF accessor component types
+FLOAT = 5126
+INDEX_COMPONENT_TYPES = {np.dtype(np.uint16): 5123, np.dtype(np.uint32): 5125}
+
+def is_loop(points, gap):
+    """Whether a path ends within gap of where it starts"""
+    points = np.asarray(points, dtype=np.float64)
+    return len(points) > 2 and np.linalg.norm(points[0] - points[-1]) < gap
+
+def _open_ends(points, closed):
+    """Drop a repeated first point at the end of a closed path (the loop is closed by the indices)"""
+    points = np.asarray(points, dtype=np.float64)
+    if closed and len(points) > 2 and np.allclose(points[0], points[-1]):
+        points = points[:-1]
+    return points
+
+def tangents(points, closed=False):
+    """Unit tangents: central differences, one-sided at the ends of an open path"""
+    if closed:
+        forward = np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)
+    else:
+        forward = np.gradient(points, axis=0)
+    length = np.linalg.norm(forward, axis=1, keepdims=True)
+    return forward / np.where(length > 0, length, 1.0)
+
+def path_frames(points, closed=False, up=UP):
+    """Per-point frames (tangent, side, normal) oriented along the path, all (N, 3) unit vectors.
+
+    side = tangent x up, normal = side x tangent: a ribbon built on side lies
+    flat in the ground plane and the frames do not twist along a flat circuit.
+    Where the path runs (nearly) along up, the x axis is used as reference instead.
+    """
+    tangent = tangents(points, closed)
+    reference = np.broadcast_to(up, tangent.shape).copy()
+    vertical = np.abs(tangent @ up) > 0.999
+    reference[vertical] = [1.0, 0.0, 0.0]
+
+    side = np.cross(tangent, reference)
+    side /= np.linalg.norm(side, axis=1, keepdims=True)
+    normal = np.cross(side, tangent)
+    return tangent, side, normal
+
+def index_array(indices, vertex_count):
+    """Indices as uint16 when every vertex fits (65535 itself is reserved), else uint32"""
+    dtype = np.uint16 if vertex_count <= 65535 else np.uint32
+    return np.ascontiguousarray(indices, dtype=dtype)
+
+def _strip_indices(rings, ring_size, closed, wrap):
+    """Two triangles per quad between consecutive rings of ring_size vertices.
+
+    wrap joins the last vertex of a ring back to its first (a tube's
+    circumference); closed joins the last ring back to the first (a loop).
+    """
+    spans = rings if closed else rings - 1
+    quads = ring_size if wrap else ring_size - 1
+    i = np.arange(spans)[:, None]
+    j = np.arange(quads)[None, :]
+
+    a = i * ring_size + j
+    b = i * ring_size + (j + 1) % ring_size
+    c = (i + 1) % rings * ring_size + j
+    d = (i + 1) % rings * ring_size + (j + 1) % ring_size
+    return np.stack([a, b, c, b, d, c], axis=-1).reshape(-1)
+
+def tube_mesh(points, radius, segments=8, closed=False):
+    """Tube around a 3D path: (vertices (N * segments, 3) float32, indices).
+
+    radius is a scalar or one value per point. Each ring lies in the plane
+    normal to the path tangent. A closed path is joined end to start.
+    """
+    points = _open_ends(points, closed)
+    _, side, normal = path_frames(points, closed)
+    angle = np.arange(segments) * (2 * np.pi / segments)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), len(points))[:, None, None]
+
+    ring = np.cos(angle)[None, :, None] * normal[:, None] + np.sin(angle)[None, :, None] * side[:, None]
+    vertices = (points[:, None] + radius * ring).reshape(-1, 3).astype(np.float32)
+    indices = _strip_indices(len(points), segments, closed, wrap=True)
+    return vertices, index_array(indices, len(vertices))
+
+def ribbon_mesh(points, width, closed=False):
+    """Flat ribbon along a 3D path: (vertices (N * 2, 3) float32, indices).
+
+    width (full width, scalar or one value per point) is laid out sideways
+    across the tangent, so a ground-plane path gives a ground-plane ribbon.
+    """
+    points = _open_ends(points, closed)
+    _, side, _ = path_frames(points, closed)
+    half = np.broadcast_to(np.asarray(width, dtype=np.float64), len(points))[:, None] / 2
+
+    vertices = np.stack([points - half * side, points + half * side], axis=1).reshape(-1, 3)
+    vertices = vertices.astype(np.float32)
+    indices = _strip_indices(len(points), 2, closed, wrap=False)
+    return vertices, index_array(indices, len(vertices))
@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
-import json
 from pathlib import Path
 from skimage import morphology
+from path_simplify import simplify
+from skeleton_path import order_path
+from mesh_builder import is_loop, tube_mesh
+from glb_export import write_glb
 
 def extract_all_segments(image_path):
     img = cv2.imread(str(image_path))
@@ -39,31 +42,11 @@ def extract_all_segments(image_path):
     # Remove duplicates
     all_points = np.unique(all_points, axis=0)
     
-    # Sort points to create continuous path
-    # Start from leftmost point
-    start_idx = np.argmin(all_points[:, 1])
+    # Order into a continuous path; gaps up to MAX_GAP_PX are bridged, stray pieces left out
+    ordered = all_points[order_path(all_points)]
     
-    ordered = [all_points[start_idx]]
-    remaining = list(range(len(all_points)))
-    remaining.remove(start_idx)
-    
-    # Greedy nearest neighbor
-    while remaining:
-        last = ordered[-1]
-        distances = [np.linalg.norm(last - all_points[i]) for i in remaining]
-        nearest_idx = remaining[np.argmin(distances)]
-        
-        # If gap is too large, find closest unvisited point
-        if distances[np.argmin(distances)] > 50:
-            break
-            
-        ordered.append(all_points[nearest_idx])
-        remaining.remove(nearest_idx)
-    
-    # Simplify path
-    ordered = np.array(ordered)
-    step = max(1, len(ordered) // 200)
-    simplified = ordered[::step]
+    # Simplify path (within TOLERANCE_PX of the traced path)
+    simplified = ordered[simplify(ordered)]
     
     # Convert to 3D
     h, w = img.shape[:2]
@@ -81,86 +64,12 @@ def create_gltf(path_points, output_path, track_name):
     if len(path_points) < 2:
         return
     
-    vertices = []
-    indices = []
-    radius = 8.0  # Increased radius
-    segments = 8
-    
-    for i, point in enumerate(path_points):
-        for j in range(segments):
-            angle = (j / segments) * 2 * np.pi
-            x = point[0]
-            y = point[1] + radius * np.cos(angle)
-            z = point[2] + radius * np.sin(angle)
-            vertices.extend([x, y, z])
-    
-    for i in range(len(path_points) - 1):
-        for j in range(segments):
-            next_j = (j + 1) % segments
-            a = i * segments + j
-            b = i * segments + next_j
-            c = (i + 1) * segments + j
-            d = (i + 1) * segments + next_j
-            indices.extend([a, b, c, b, d, c])
-    
     # Close loop if endpoints are close
-    dist = np.linalg.norm(np.array(path_points[0]) - np.array(path_points[-1]))
-    if dist < 30:
-        i = len(path_points) - 1
-        for j in range(segments):
-            next_j = (j + 1) % segments
-            a = i * segments + j
-            b = i * segments + next_j
-            c = j
-            d = next_j
-            indices.extend([a, b, c, b, d, c])
-    
-    gltf = {
-        "asset": {"version": "2.0"},
-        "scene": 0,
-        "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0, "name": track_name}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {"POSITION": 0},
-                "indices": 1,
-                "mode": 4
-            }]
-        }],
-        "accessors": [
-            {
-                "bufferView": 0,
-                "componentType": 5126,
-                "count": len(vertices) // 3,
-                "type": "VEC3",
-                "max": [max(vertices[0::3]), max(vertices[1::3]), max(vertices[2::3])],
-                "min": [min(vertices[0::3]), min(vertices[1::3]), min(vertices[2::3])]
-            },
-            {
-                "bufferView": 1,
-                "componentType": 5123,
-                "count": len(indices),
-                "type": "SCALAR"
-            }
-        ],
-        "bufferViews": [
-            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertices) * 4},
-            {"buffer": 0, "byteOffset": len(vertices) * 4, "byteLength": len(indices) * 2}
-        ],
-        "buffers": [{
-            "byteLength": len(vertices) * 4 + len(indices) * 2,
-            "uri": f"{track_name}.bin"
-        }]
-    }
-    
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=2)
-    
-    with open(output_path.with_suffix('.bin'), 'wb') as f:
-        f.write(np.array(vertices, dtype=np.float32).tobytes())
-        f.write(np.array(indices, dtype=np.uint16).tobytes())
+    closed = is_loop(path_points, gap=30)
+    vertices, indices = tube_mesh(path_points, radius=8.0, segments=8, closed=closed)  # Increased radius
+    data = write_glb(vertices, indices, output_path, track_name)
     
-    print(f"✓ {track_name}: {len(path_points)} points")
+    print(f"✓ {track_name}: {len(path_points)} points, {len(data)} bytes")
 
 circuits = {
     'Barber': 'source/images/Barber_Circuit_Map.png',
@@ -172,10 +81,11 @@ circuits = {
     'VIR': 'source/images/VIR_map.png'
 }
 
-for name, img_path in circuits.items():
-    print(f"\nProcessing {name}...")
-    path_points = extract_all_segments(img_path)
-    if path_points:
-        create_gltf(path_points, Path(f'output/{name}.gltf'), name)
-    else:
-        print(f"✗ Failed")
+if __name__ == '__main__':
+    for name, img_path in circuits.items():
+        print(f"\nProcessing {name}...")
+        path_points = extract_all_segments(img_path)
+        if path_points:
+            create_gltf(path_points, Path(f'output/{name}.glb'), name)
+        else:
+            print(f"✗ Failed")
@@ -0,0 +1,40 @@
+import numpy as np
+
+# Maximum deviation of the simplified path from the traced one, in image pixels
+TOLERANCE_PX = 1.5
+
+def _segment_distance(points, starts, ends):
+    vectors = ends - starts
+    length_sq = np.einsum('nd,nd->n', vectors, vectors)
+    t = np.einsum('nd,nd->n', points - starts, vectors) / np.where(length_sq > 0, length_sq, 1.0)
+    nearest = starts + np.clip(t, 0.0, 1.0)[:, None] * vectors
+    return np.linalg.norm(points - nearest, axis=1)
+
+def simplify(points, tolerance=TOLERANCE_PX, closed=False):
+    """Ramer-Douglas-Peucker: indices of the points kept, every dropped point within tolerance.
+
+    Iterative and vectorized: each pass splits every range at its farthest point at once.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return np.arange(len(points))
+
+    # A closed loop is simplified as an open line that ends where it starts
+    work = np.vstack([points, points[:1]]) if closed else points
+    kept = np.array([0, len(work) - 1])
+
+    while True:
+        owner = np.minimum(np.searchsorted(kept, np.arange(len(work)), side='right') - 1, len(kept) - 2)
+        deviation = _segment_distance(work, work[kept[owner]], work[kept[owner + 1]])
+        deviation[kept] = 0.0
+
+        range_max = np.maximum.reduceat(deviation, kept[:-1])
+        split = range_max > tolerance
+        if not split.any():
+            break
+
+        candidates = np.flatnonzero(split[owner] & (deviation == range_max[owner]))
+        _, first = np.unique(owner[candidates], return_index=True)
+        kept = np.sort(np.concatenate([kept, candidates[first]]))
+
+    return kept[:-1] if closed else kept
@@ -1,9 +1,10 @@
 import cv2
 import numpy as np
-import json
 from pathlib import Path
 from skimage import morphology
-from scipy.spatial import cKDTree
+from path_simplify import simplify
+from skeleton_path import trace_centerline
+from glb_export import create_gltf_line
 
 def extract_segment(mask):
     """Extract ordered points from a single segment"""
@@ -13,39 +14,9 @@ def extract_segment(mask):
     if len(points) < 2:
         return []
     
-    # Build adjacency graph
-    tree = cKDTree(points)
-    pairs = tree.query_pairs(r=2.0)
-    
-    adj = {i: [] for i in range(len(points))}
-    for i, j in pairs:
-        adj[i].append(j)
-        adj[j].append(i)
-    
-    # Find endpoint (degree 1) or use first point
-    start_idx = 0
-    for i, neighbors in adj.items():
-        if len(neighbors) == 1:
-            start_idx = i
-            break
-    
-    # Traverse path
-    visited = set()
-    path = []
-    current = start_idx
-    
-    while current is not None:
-        visited.add(current)
-        path.append(points[current])
-        
-        next_node = None
-        for neighbor in adj[current]:
-            if neighbor not in visited:
-                next_node = neighbor
-                break
-        current = next_node
-    
-    return np.array(path) if path else np.array([])
+    # Longest spur-free path (or loop) through the skeleton
+    order, _ = trace_centerline(points)
+    return points[order]
 
 def extract_circuit(image_path):
     img = cv2.imread(str(image_path))
@@ -102,9 +73,8 @@ def extract_circuit(image_path):
     
     all_points = np.array(all_points)
     
-    # Simplify
-    step = max(1, len(all_points) // 300)
-    simplified = all_points[::step]
+    # Simplify (within TOLERANCE_PX of the traced path)
+    simplified = all_points[simplify(all_points)]
     
     # Convert to 3D
     h, w = img.shape[:2]
@@ -118,63 +88,6 @@ def extract_circuit(image_path):
     
     return path_3d
 
-def create_gltf_line(path_points, output_path, track_name):
-    if len(path_points) < 2:
-        return
-    
-    vertices = []
-    for p in path_points:
-        vertices.extend(p)
-    
-    indices = list(range(len(path_points)))
-    
-    gltf = {
-        "asset": {"version": "2.0"},
-        "scene": 0,
-        "scenes": [{"nodes": [0]}],
-        "nodes": [{"mesh": 0, "name": track_name}],
-        "meshes": [{
-            "primitives": [{
-                "attributes": {"POSITION": 0},
-                "indices": 1,
-                "mode": 3
-            }]
-        }],
-        "accessors": [
-            {
-                "bufferView": 0,
-                "componentType": 5126,
-                "count": len(path_points),
-                "type": "VEC3",
-                "max": [max(vertices[0::3]), max(vertices[1::3]), max(vertices[2::3])],
-                "min": [min(vertices[0::3]), min(vertices[1::3]), min(vertices[2::3])]
-            },
-            {
-                "bufferView": 1,
-                "componentType": 5123,
-                "count": len(indices),
-                "type": "SCALAR"
-            }
-        ],
-        "bufferViews": [
-            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertices) * 4},
-            {"buffer": 0, "byteOffset": len(vertices) * 4, "byteLength": len(indices) * 2}
-        ],
-        "buffers": [{
-            "byteLength": len(vertices) * 4 + len(indices) * 2,
-            "uri": f"{track_name}.bin"
-        }]
-    }
-    
-    with open(output_path, 'w') as f:
-        json.dump(gltf, f, indent=2)
-    
-    with open(output_path.with_suffix('.bin'), 'wb') as f:
-        f.write(np.array(vertices, dtype=np.float32).tobytes())
-        f.write(np.array(indices, dtype=np.uint16).tobytes())
-    
-    print(f"✓ {track_name}: {len(path_points)} points")
-
 circuits = {
     'Barber': 'source/images/Barber_Circuit_Map.png',
     'COTA': 'source/images/COTA_Circuit_Map.png',
@@ -185,10 +98,11 @@ circuits = {
     'VIR': 'source/images/VIR_map.png'
 }
 
-for name, img_path in circuits.items():
-    print(f"\nProcessing {name}...")
-    path_points = extract_circuit(img_path)
-    if path_points:
-        create_gltf_line(path_points, Path(f'output/{name}.gltf'), name)
-    else:
-        print(f"✗ Failed")
+if __name__ == '__main__':
+    for name, img_path in circuits.items():
+        print(f"\nProcessing {name}...")
+        path_points = extract_circuit(img_path)
+        if path_points:
+            create_gltf_line(path_points, Path(f'output/{name}.glb'), name)
+        else:
+            print(f"✗ Failed")
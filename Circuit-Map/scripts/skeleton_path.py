@@ -0,0 +1,314 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+# 8-connected neighbourhood of a pixel (row, col), clockwise from straight up
+OFFSETS = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
+# A cycle shorter than this (in pixels) is a clump at a junction, not a circuit loop
+MIN_LOOP_PX = 50
+
+# Dead-end branches shorter than this (in pixels) off a junction are skeleton noise
+MIN_SPUR_PX = 15
+
+# Widest gap (in pixels) bridged between pieces of a path; legend and text are farther away
+MAX_GAP_PX = 25
+
+def _ring_connected(mask):
+    """Whether the neighbours in an 8-bit mask (bit i = OFFSETS[i]) touch each other, two or more of them"""
+    ring = [i for i in range(8) if mask >> i & 1]
+    if len(ring) < 2:
+        return False
+    # Neighbours next to each other round the ring touch, and so do two edge neighbours a corner apart
+    touch = lambda i, j: (i - j) % 8 in (1, 7) or (i % 2 == 0 and j % 2 == 0 and (i - j) % 8 in (2, 6))
+    seen, stack = {ring[0]}, [ring[0]]
+    while stack:
+        i = stack.pop()
+        for j in ring:
+            if j not in seen and touch(i, j):
+                seen.add(j)
+                stack.append(j)
+    return len(seen) == len(ring)
+
+# Neighbourhoods whose centre pixel is redundant: its neighbours stay connected without it
+REDUNDANT = np.array([_ring_connected(mask) for mask in range(256)])
+
+def _raster(points):
+    """Pixels shifted into a padded lookup table: (local row/col, table of pixel index or -1)"""
+    local = points - points.min(axis=0) + 1
+    lookup = np.full(local.max(axis=0) + 2, -1, dtype=np.int32)
+    lookup[local[:, 0], local[:, 1]] = np.arange(len(points))
+    return local, lookup
+
+def _neighbour_masks(local, lookup):
+    masks = np.zeros(len(local), dtype=np.int64)
+    for bit, (dy, dx) in enumerate(OFFSETS):
+        masks |= (lookup[local[:, 0] + dy, local[:, 1] + dx] >= 0).astype(np.int64) << bit
+    return masks
+
+def thin(points):
+    """Indices of the skeleton pixels (N, 2 row/col) left once redundant ones are removed.
+
+    skeletonize leaves corner pixels next to a diagonal step and small clumps
+    at junctions, which make triangles in the pixel graph. A pixel whose
+    neighbours touch each other is dropped; one at a time, since dropping a
+    clump pixel can make its neighbours necessary. Connectivity is kept.
+    """
+    points = np.asarray(points, dtype=np.int64)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    local, lookup = _raster(points)
+    while True:
+        removed = False
+        alive = np.flatnonzero(lookup[local[:, 0], local[:, 1]] >= 0)
+        for i in alive[REDUNDANT[_neighbour_masks(local[alive], lookup)]]:
+            r, c = local[i]
+            mask = sum(1 << bit for bit, (dy, dx) in enumerate(OFFSETS) if lookup[r + dy, c + dx] >= 0)
+            if REDUNDANT[mask]:
+                lookup[r, c] = -1
+                removed = True
+        if not removed:
+            return np.sort(lookup[lookup >= 0]).astype(np.int64)
+
+def pixel_graph(points):
+    """8-neighbour adjacency of skeleton pixels (N, 2 row/col) as a sparse matrix.
+
+    Built with a raster lookup table instead of pairwise distances: O(n).
+    Edge weights are pixel distances (1 or sqrt(2)).
+    """
+    points = np.asarray(points, dtype=np.int64)
+    n = len(points)
+    local, lookup = _raster(points)
+
+    rows, cols, weights = [], [], []
+    for dy, dx in OFFSETS:
+        neighbour = lookup[local[:, 0] + dy, local[:, 1] + dx]
+        has = neighbour >= 0
+        rows.append(np.flatnonzero(has))
+        cols.append(neighbour[has])
+        weights.append(np.full(has.sum(), np.hypot(dy, dx)))
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    return csr_matrix((np.concatenate(weights), (rows, cols)), shape=(n, n))
+
+def chains(graph):
+    """Split a pixel graph into chains: runs of degree-2 pixels between two other pixels.
+
+    Each chain is a node list from one end to the other (ends included); every
+    edge is in exactly one chain. A loop without junctions is one chain that
+    ends where it starts. Isolated pixels are in none.
+    """
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    degree = np.diff(graph.indptr)
+    walked = [False] * len(indices)
+
+    def slot(v, u):
+        return indices.index(u, indptr[v], indptr[v + 1])
+
+    def follow(v, edge):
+        chain = [v]
+        while True:
+            u = indices[edge]
+            walked[edge] = walked[slot(u, chain[-1])] = True
+            chain.append(u)
+            if degree[u] != 2 or u == chain[0]:
+                return chain
+            edge = indptr[u] if not walked[indptr[u]] else indptr[u] + 1
+
+    result = []
+    # Ends and junctions first; pixels still unwalked after that lie on plain loops
+    for v in np.concatenate([np.flatnonzero(degree != 2), np.flatnonzero(degree == 2)]).tolist():
+        for edge in range(indptr[v], indptr[v + 1]):
+            if not walked[edge]:
+                result.append(follow(v, edge))
+    return result
+
+def _heading(points, path, steps=5):
+    """Unit direction over the last few pixels of a path (zero if it has one pixel)"""
+    delta = points[path[-1]] - points[path[max(len(path) - 1 - steps, 0)]]
+    length = np.hypot(*delta)
+    return delta / length if length > 0 else delta
+
+def order_path(points, max_gap=MAX_GAP_PX):
+    """Order skeleton pixels into one path. Returns indices into points.
+
+    Redundant pixels are thinned out and the skeleton is split into chains
+    between junctions, dropping spurs shorter than MIN_SPUR_PX. The walk
+    follows whole chains, taking the straightest unused one at each junction;
+    at a dead end it jumps to the nearest end of an unused chain (KD-tree), so
+    a jump only ever joins two chain ends. A jump longer than max_gap ends the
+    walk; walks restart from the leftmost unused end, and the longest one is
+    returned, leaving stray pieces (legend, text) out.
+    """
+    points = np.asarray(points)
+    kept = thin(points)
+    if len(kept) < 2:
+        return kept
+    pixels = points[kept].astype(np.float64)
+    graph = pixel_graph(points[kept])
+    degree = np.diff(graph.indptr)
+
+    pieces = chains(graph)
+    end_degrees = [degree[[c[0], c[-1]]] for c in pieces]
+    spur = [len(c) < MIN_SPUR_PX and d.min() == 1 and d.max() > 2 for c, d in zip(pieces, end_degrees)]
+    if not all(spur):
+        pieces = [c for c, s in zip(pieces, spur) if not s]
+    if not pieces:
+        return kept[:1]
+
+    ends = np.array([[c[0], c[-1]] for c in pieces]).ravel()
+    tree = cKDTree(pixels[ends])
+    incident = {}
+    for e, v in enumerate(ends.tolist()):
+        incident.setdefault(v, []).append(e)
+    used = np.zeros(len(pieces), dtype=bool)
+
+    def nearest_open(v):
+        k = 1
+        while True:
+            k = min(2 * k, len(ends))
+            distances, nearest = tree.query(pixels[v], k=k)
+            distances, nearest = np.atleast_1d(distances), np.atleast_1d(nearest)
+            open_ends = ~used[nearest // 2]
+            if open_ends.any() or k == len(ends):
+                break
+        if not open_ends.any():
+            return None, np.inf
+        return nearest[open_ends][0], distances[open_ends][0]
+
+    walks = []
+    while not used.all():
+        # Leftmost open end, dead ends first
+        open_ends = ends[np.repeat(~used, 2)]
+        current = int(open_ends[np.lexsort((pixels[open_ends, 1], degree[open_ends] != 1))[0]])
+        walk = [current]
+        while True:
+            options = [e for e in incident[current] if not used[e // 2]]
+            if options:
+                heading = _heading(pixels, walk)
+                # Each option oriented to start at the current pixel
+                oriented = [pieces[e // 2] if e % 2 == 0 else pieces[e // 2][::-1] for e in options]
+                best = int(np.argmax([heading @ _heading(pixels, c[:6]) for c in oriented]))
+                used[options[best] // 2] = True
+                walk.extend(oriented[best][1:])
+                current = walk[-1]
+                continue
+            e, gap = nearest_open(current)
+            if e is None or gap > max_gap:
+                break
+            current = int(ends[e])
+            walk.append(current)
+        walks.append(walk)
+
+    walk = max(walks, key=len)
+    if len(walks) > 1:
+        print(f"  Left out {len(walks) - 1} pieces beyond {max_gap}px gaps "
+              f"({len(walk)}/{len(kept)} pixels ordered)")
+    return kept[np.asarray(walk, dtype=np.int64)]
+
+def _two_core(graph, alive):
+    """Drop pixels with fewer than two live neighbours until none are left: removes every spur"""
+    adjacency = (graph > 0).astype(np.int32)
+    while True:
+        degree = adjacency @ alive.astype(np.int32)
+        spur = alive & (degree < 2)
+        if not spur.any():
+            return alive
+        alive = alive & ~spur
+
+def _walk(predecessors, target):
+    """Shortest-path node list from the dijkstra source to target"""
+    path = [target]
+    while predecessors[path[-1]] >= 0:
+        path.append(predecessors[path[-1]])
+    return path[::-1]
+
+def _farthest(graph, source):
+    distances, predecessors = dijkstra(graph, indices=source, return_predecessors=True)
+    distances[np.isinf(distances)] = -1
+    target = int(np.argmax(distances))
+    return target, _walk(predecessors, target)
+
+def _outer_cycle(points):
+    """Outer boundary of a pixel loop (N, 2 row/col): indices, clockwise from its top-left pixel.
+
+    Moore-neighbour tracing: at each pixel the clockwise scan starts just
+    past the pixel it came from, so the walk hugs the outside of the loop and
+    never takes an inner chord or an inner loop. Where loops hang together by
+    a pixel or a bridge the walk passes some pixels twice; it is split there
+    and the longest simple cycle kept.
+    """
+    local, lookup = _raster(np.asarray(points, dtype=np.int64))
+    start = int(np.lexsort((local[:, 1], local[:, 0]))[0])
+    # Nothing is left of or above the top-left pixel: scanning starts as if coming from the west
+    back = OFFSETS.index((0, -1))
+    path, first = [start], None
+    while len(path) <= 2 * len(points):
+        r, c = local[path[-1]]
+        for turn in range(1, 9):
+            direction = (back + turn) % 8
+            dy, dx = OFFSETS[direction]
+            step = int(lookup[r + dy, c + dx])
+            if step >= 0:
+                break
+        if first is None:
+            first = step
+        elif path[-1] == start and step == first:
+            break
+        path.append(step)
+        back = (direction + 4) % 8
+    return np.asarray(_simple_cycle(path[:-1]), dtype=np.int64)
+
+def _simple_cycle(walk):
+    """Longest simple cycle left by splitting a closed walk at its repeated nodes"""
+    while True:
+        seen = {}
+        for i, v in enumerate(walk):
+            if v in seen:
+                break
+            seen[v] = i
+        else:
+            return walk
+        # Two closed walks through v: the stretch between its visits, and the rest
+        first = seen[v]
+        inner, rest = walk[first:i], walk[:first] + walk[i:]
+        if len(inner) > 2:
+            return max(_simple_cycle(inner), _simple_cycle(rest), key=len)
+        # Out and back along a bridge: drop the turn
+        walk = rest
+
+def trace_centerline(points, min_loop=MIN_LOOP_PX):
+    """Ordered centerline of a skeleton: indices into points, and whether it is a closed loop.
+
+    Redundant pixels are thinned out and every spur pruned by peeling pixels
+    with a single neighbour, leaving each piece's cycles (its 2-core). Of
+    the pieces with at least min_loop cycle pixels, the one whose cycles
+    span the widest extent is the circuit (a logo or legend band may have
+    more pixels, but is smaller); its outer cycle is traced. Only without such a loop is the longest path of the
+    largest piece returned (the graph diameter, which leaves every side
+    branch out). Deterministic for a given skeleton.
+    """
+    points = np.asarray(points)
+    kept = thin(points)
+    if len(kept) < 2:
+        return kept, False
+
+    graph = pixel_graph(points[kept])
+    count, labels = connected_components(graph, directed=False)
+    core = _two_core(graph, np.ones(len(kept), dtype=bool))
+    loops = np.flatnonzero(np.bincount(labels[core], minlength=count) >= min_loop)
+
+    if len(loops):
+        # The circuit spans the map; logos and legend bands are small
+        extents = [np.ptp(points[kept][core & (labels == piece)], axis=0).max() for piece in loops]
+        nodes = np.flatnonzero(core & (labels == loops[np.argmax(extents)]))
+        return kept[nodes[_outer_cycle(points[kept][nodes])]], True
+
+    # Open path: the longest shortest path (double sweep from any pixel)
+    nodes = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    tree = graph[nodes][:, nodes]
+    end, _ = _farthest(tree, 0)
+    _, path = _farthest(tree, end)
+    return kept[nodes[np.asarray(path)]], False
@@ -0,0 +1,37 @@
+import cv2
+import numpy as np
+import pytest
+
+from circuit_map import CIRCUITS, IMAGES
+from improved_converter import extract_circuit_path
+from skeleton_path import trace_centerline
+
+def _ring(top, left, height, width):
+    rows = [(top + r, left + c) for r in (0, height) for c in range(width + 1)]
+    cols = [(top + r, left + c) for c in (0, width) for r in range(1, height)]
+    return rows + cols
+
+def test_widest_loop_beats_a_dense_logo():
+    # A logo of many small loops has more cycle pixels than the circuit but a smaller extent
+    logo = [p for i in range(40) for p in _ring(0, 12 * i, 10, 10)]
+    circuit = _ring(100, 0, 300, 400)
+    points = np.unique(np.array(logo + circuit), axis=0)
+
+    order, closed = trace_centerline(points)
+    traced = points[order]
+    assert closed
+    assert traced[:, 0].min() >= 100
+    assert np.ptp(traced, axis=0).tolist() == [300, 400]
+    assert np.abs(np.diff(traced, axis=0)).max() <= 1
+
+@pytest.mark.parametrize('name', sorted(CIRCUITS))
+def test_skeleton_loop_spans_the_map(name):
+    image_path = IMAGES / f"{CIRCUITS[name]}.png"
+    h, w = cv2.imread(str(image_path)).shape[:2]
+    scale = 200.0 / max(h, w)
+
+    points = np.asarray(extract_circuit_path(image_path))
+    width, depth = np.ptp(points[:, [0, 2]], axis=0) / scale
+    # Every circuit map is at least half as wide or tall as the page, and much larger than its logo
+    assert max(width / w, depth / h) > 0.5
+    assert min(width / w, depth / h) > 0.2
@@ -0,0 +1,71 @@
+"""
+Parallel build of all track and telemetry outputs
+
+Usage:
+    python build_all.py [--workers N] [--stage tracks|telemetry|all]
+"""
+import argparse
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def _run_job(func, job):
+    """Run one job in a worker, isolating its failure from the others"""
+    start = time.time()
+    try:
+        func(*job)
+        return None, time.time() - start
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", time.time() - start
+
+def run_jobs(func, jobs, workers=None):
+    """
+    Run func(*job) for every job over a process pool
+
+    The last element of each job tuple is used as its name. Returns a list of
+    (name, error or None, seconds) in completion order.
+    """
+    workers = workers or os.cpu_count()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)) or 1) as pool:
+        futures = {pool.submit(_run_job, func, job): job[-1] for job in jobs}
+        for future in as_completed(futures):
+            name = futures[future]
+            error, seconds = future.result()
+            if error:
+                print(f"✗ Failed: {name}: {error}")
+            results.append((name, error, seconds))
+
+    return results
+
+def print_summary(title, results, wall_seconds):
+    """Print a per-job report for one stage"""
+    ok = sum(1 for _, error, _ in results if error is None)
+    print(f"\n{title}: {ok}/{len(results)} succeeded in {wall_seconds:.1f}s")
+    for name, error, seconds in sorted(results):
+        status = "✓" if error is None else "✗"
+        print(f"  {status} {name:<35} {seconds:7.1f}s" + (f"  {error}" if error else ""))
+
+def build_stage(title, func, jobs, workers=None):
+    start = time.time()
+    results = run_jobs(func, jobs, workers)
+    print_summary(title, results, time.time() - start)
+    return results
+
+if __name__ == "__main__":
+    from generate_track import generate_track_json, TRACK_JOBS
+    from parse_telemetry import generate_telemetry_json, TELEMETRY_JOBS
+
+    parser = argparse.ArgumentParser(description="Build track and telemetry JSON in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--stage", choices=["tracks", "telemetry", "all"], default="all")
+    args = parser.parse_args()
+
+    # Telemetry is matched against the track JSON, so tracks are built first
+    if args.stage in ("tracks", "all"):
+        # One job per process already: fuse each track's laps serially
+        build_stage("Tracks", functools.partial(generate_track_json, workers=1), TRACK_JOBS, args.workers)
+    if args.stage in ("telemetry", "all"):
+        build_stage("Telemetry", generate_telemetry_json, TELEMETRY_JOBS, args.workers)
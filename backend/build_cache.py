@@ -0,0 +1,110 @@
+"""
+Content-addressed build cache for generated track and telemetry JSON
+
+Every build stage is keyed on a hash of its inputs: the fingerprint of the
+source files (size/mtime, or a content hash) plus the stage parameters, chained
+through the keys of the stages it depends on. A stage whose key is already in
+the cache is loaded instead of recomputed, so after a parameter change only the
+stages downstream of it run again. A whole output is skipped when its recorded
+key still matches and the file on disk is the one that was written.
+
+Layout:
+    <cache_dir>/stages/<stage>-<key>.npy|.json   cached stage results
+    <cache_dir>/manifest/<output hash>.json      what each output was built from
+"""
+import glob
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+CACHE_DIR = "../.build_cache"
+
+def _sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(path, content_hash=False):
+    """Identify a file by size and mtime, or additionally by its SHA-256"""
+    stat = os.stat(path)
+    fingerprint = {
+        "path": os.path.realpath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime
+    }
+    if content_hash:
+        fingerprint["sha256"] = _sha256(path)
+    return fingerprint
+
+def make_key(*parts):
+    """Stable short hash of JSON-serialisable parts (fingerprints, params, other keys)"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+def _atomic_write(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def cached_stage(name, key, compute, cache_dir=CACHE_DIR):
+    """
+    Return the result of compute() for this stage key, computing it only once
+
+    NumPy arrays are stored as .npy, anything else must be JSON-serialisable.
+    """
+    base = os.path.join(cache_dir, 'stages', f"{name}-{key}")
+    if os.path.exists(base + '.npy'):
+        print(f"  Cached: {name}")
+        return np.load(base + '.npy')
+    if os.path.exists(base + '.json'):
+        print(f"  Cached: {name}")
+        with open(base + '.json', 'r') as f:
+            return json.load(f)
+
+    value = compute()
+    if isinstance(value, np.ndarray):
+        _atomic_write(base + '.npy', lambda f: np.save(f, value))
+    else:
+        _atomic_write(base + '.json', lambda f: f.write(json.dumps(value).encode('utf-8')))
+    return value
+
+def _manifest_path(output_path, cache_dir):
+    name = hashlib.sha256(os.path.realpath(output_path).encode('utf-8')).hexdigest()[:24]
+    return os.path.join(cache_dir, 'manifest', f"{name}.json")
+
+def is_up_to_date(output_path, key, cache_dir=CACHE_DIR):
+    """True when output_path was built with this key and has not been touched since"""
+    path = _manifest_path(output_path, cache_dir)
+    if not os.path.exists(path) or not os.path.exists(output_path):
+        return False
+    with open(path, 'r') as f:
+        entry = json.load(f)
+    return entry["key"] == key and entry["output"] == file_fingerprint(output_path)
+
+def record_build(output_path, key, inputs, params, cache_dir=CACHE_DIR):
+    """Record in the manifest what output_path was built from"""
+    entry = {
+        "output": file_fingerprint(output_path),
+        "key": key,
+        "inputs": inputs,
+        "params": params,
+        "built_at": time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    _atomic_write(_manifest_path(output_path, cache_dir),
+                  lambda f: f.write(json.dumps(entry, indent=2).encode('utf-8')))
+
+def read_manifest(cache_dir=CACHE_DIR):
+    """All manifest entries, keyed by output path"""
+    manifest = {}
+    for path in glob.glob(os.path.join(cache_dir, 'manifest', '*.json')):
+        with open(path, 'r') as f:
+            entry = json.load(f)
+        manifest[entry["output"]["path"]] = entry
+    return manifest
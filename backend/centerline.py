@@ -0,0 +1,198 @@
+"""
+Fused reference centerline from every clean lap of every vehicle in a race
+
+A single lap carries its driver's line and its GPS noise. Fusing all laps:
+
+1. every lap is projected into one shared frame, smoothed and resampled to a
+   dense, evenly spaced polyline (laps run in parallel over a process pool)
+2. laps that are not a full, continuous circuit are dropped (out/in laps,
+   GPS dropouts, fragments)
+3. each lap is cut at every station of a reference line (nearest point
+   within a window around the expected index) so all laps share stations
+4. the centerline is the per-station median (or trimmed mean); the lateral
+   offsets of the laps about it give the spread of driven lines, which is
+   used as a track-width estimate
+
+Steps 3-4 are repeated with the fused line as the new reference.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from parse_gps import iter_gps_laps, project_laps, track_origin
+from smoothing import smooth
+from track_geometry import cumulative_distance, resample_arc_length
+
+MIN_LAP_POINTS = 200
+MAX_CLOSURE_GAP = 50.0    # metres between the first and last sample of a full lap
+MAX_GAP = 30.0            # metres between consecutive samples (GPS dropout)
+LENGTH_TOLERANCE = 0.05   # allowed deviation from the median lap length
+SEARCH_FRACTION = 0.05    # cross-section search window, fraction of a lap
+
+def collect_laps(csv_path):
+    """Read every lap of every vehicle in one pass: list of (vehicle_id, lap, (N, 2) lat/lon)"""
+    laps = []
+    for vehicle_id, lap, gps_points in iter_gps_laps(csv_path):
+        gps = np.asarray(gps_points, dtype=np.float64).reshape(-1, 2)
+        if len(gps):
+            laps.append((vehicle_id, lap, gps))
+    return laps
+
+def _lap_problem(points):
+    """Why a projected lap is not a full, continuous circuit (None when it is)"""
+    if len(points) < MIN_LAP_POINTS:
+        return "too few points"
+    if np.linalg.norm(points[-1] - points[0]) > MAX_CLOSURE_GAP:
+        return "does not close"
+    if np.linalg.norm(np.diff(points, axis=0), axis=1).max() > MAX_GAP:
+        return "GPS gap"
+    return None
+
+def clean_laps(projected):
+    """
+    Indices of laps that are full circuits of about the median lap length
+
+    Returns (kept, rejected) where rejected maps index -> reason.
+    """
+    rejected = {}
+    for i, points in enumerate(projected):
+        problem = _lap_problem(points)
+        if problem:
+            rejected[i] = problem
+
+    candidates = [i for i in range(len(projected)) if i not in rejected]
+    if candidates:
+        lengths = {i: cumulative_distance(projected[i], closed=True)[-1] for i in candidates}
+        median = np.median(list(lengths.values()))
+        for i in candidates:
+            if abs(lengths[i] - median) > LENGTH_TOLERANCE * median:
+                rejected[i] = "lap length"
+
+    kept = [i for i in range(len(projected)) if i not in rejected]
+    return kept, rejected
+
+def _prepare_lap(job):
+    """Smooth one lap and resample it every `spacing` metres (runs in a worker)"""
+    points, spacing, window = job
+    points = smooth(points, 'moving_average', window, closed=True)
+    count = max(2, int(round(cumulative_distance(points, closed=True)[-1] / spacing)))
+    return resample_arc_length(points, count, closed=True)[0]
+
+def _map(func, jobs, workers):
+    # A job already running in a worker process (e.g. build_all's pool) stays serial by default
+    if workers is None and multiprocessing.parent_process() is not None:
+        workers = 1
+    if workers == 1 or len(jobs) < 2:
+        return [func(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(jobs))) as pool:
+        return list(pool.map(func, jobs))
+
+def _normals(points):
+    """Unit normals in the x/z plane of a closed polyline"""
+    tangent = np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)
+    normal = np.column_stack([-tangent[:, 2], np.zeros(len(points)), tangent[:, 0]])
+    length = np.linalg.norm(normal, axis=1, keepdims=True)
+    return normal / np.where(length > 0, length, 1.0)
+
+def cross_section(reference, lap, start=None):
+    """
+    Point of `lap` nearest to every station of `reference`
+
+    Both are closed, evenly spaced polylines in the same direction. The
+    search only looks at a window around where the station should fall, so
+    it is O(len(reference) * window) and cannot jump to the other side of a
+    hairpin. start is the lap index matching reference[0] (default: nearest).
+    """
+    n, m = len(reference), len(lap)
+    if start is None:
+        start = int(np.argmin(np.linalg.norm(lap - reference[0], axis=1)))
+
+    half = max(1, int(SEARCH_FRACTION * m))
+    expected = start + np.round(np.arange(n) * (m / n)).astype(np.int64)
+    candidates = (expected[:, None] + np.arange(-half, half + 1)) % m
+    distance = np.linalg.norm(lap[candidates] - reference[:, None, :], axis=2)
+    return lap[candidates[np.arange(n), np.argmin(distance, axis=1)]]
+
+def _fuse(stack, method, trim):
+    if method == 'median':
+        return np.median(stack, axis=0)
+    if method == 'trimmed_mean':
+        cut = int(trim * len(stack))
+        ordered = np.sort(stack, axis=0)
+        return ordered[cut:len(stack) - cut].mean(axis=0)
+    raise ValueError(f"Unknown fusion method: {method}")
+
+def fuse_centerline(laps, spacing=1.0, method='median', trim=0.1, iterations=2, window=15,
+                    workers=None):
+    """
+    Robust centerline of many laps already projected into one frame
+
+    Args:
+        laps: list of (N_i, 3) arrays (e.g. from parse_gps.project_laps)
+        spacing: station spacing in metres
+        method: 'median' or 'trimmed_mean' (drops `trim` of each tail per station)
+        iterations: cross-section passes against the previous fused line
+        window: moving-average window (samples) applied to each lap first
+        workers: processes for per-lap preparation (default: all cores, or 1
+                 when already running in a worker process)
+
+    Returns:
+        dict with 'points' (S, 3), 'stations' (S,), 'offsets' (laps, S) signed
+        lateral offset of every lap, 'spread' (S,) their standard deviation and
+        'width' (S,) the 5-95 percentile range of offsets.
+    """
+    if not laps:
+        raise ValueError("No laps to fuse")
+
+    dense = _map(_prepare_lap, [(np.asarray(lap, dtype=np.float64), spacing, window) for lap in laps],
+                 workers)
+
+    # Start from the lap of median length, cut into `spacing` stations
+    lengths = [cumulative_distance(lap, closed=True)[-1] for lap in dense]
+    reference = dense[int(np.argsort(lengths)[len(lengths) // 2])]
+
+    for _ in range(max(1, iterations)):
+        stack = np.stack([cross_section(reference, lap) for lap in dense])
+        fused = _fuse(stack, method, trim)
+        count = max(2, int(round(cumulative_distance(fused, closed=True)[-1] / spacing)))
+        reference, stations = resample_arc_length(fused, count, closed=True)
+
+    stack = np.stack([cross_section(reference, lap) for lap in dense])
+    offsets = np.einsum('lsd,sd->ls', stack - reference, _normals(reference))
+    low, high = np.percentile(offsets, [5, 95], axis=0)
+
+    return {
+        "points": reference,
+        "stations": stations,
+        "offsets": offsets,
+        "spread": offsets.std(axis=0),
+        "width": high - low
+    }
+
+def build_centerline(csv_path, origin=None, method='median', spacing=1.0, workers=None):
+    """
+    Fused centerline of a whole race CSV in one batch
+
+    Returns (result, laps) where result is fuse_centerline()'s dict plus the
+    (lat, lon) 'origin' of the frame (default: track_origin() of all laps), and laps
+    lists (vehicle_id, lap, reason) for every lap, reason None when it was used.
+    """
+    laps = collect_laps(csv_path)
+    if not laps:
+        raise ValueError(f"No GPS laps in {csv_path}")
+    if origin is None:
+        stacked = np.concatenate([gps for _, _, gps in laps])
+        origin = track_origin(stacked[:, 0], stacked[:, 1])
+    projected = project_laps([gps for _, _, gps in laps], origin=origin)
+    kept, rejected = clean_laps(projected)
+    if not kept:
+        raise ValueError(f"none of the {len(laps)} laps in {csv_path} is clean")
+    print(f"  Fusing {len(kept)}/{len(laps)} laps "
+          f"from {len({laps[i][0] for i in kept})} vehicles")
+
+    result = fuse_centerline([projected[i] for i in kept], spacing=spacing, method=method,
+                             workers=workers)
+    result["origin"] = origin
+    report = [(vehicle_id, lap, rejected.get(i)) for i, (vehicle_id, lap, _) in enumerate(laps)]
+    return result, report
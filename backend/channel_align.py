@@ -0,0 +1,57 @@
+"""
+Tolerance-based as-of alignment of telemetry channels
+
+Channels are logged independently, so two channels of the same car rarely
+share exact timestamps. Instead of an exact merge (which silently drops every
+jittered sample), each sample of a reference channel is matched to the
+nearest sample of every other channel of the same vehicle within a tolerance.
+"""
+import pandas as pd
+
+DEFAULT_TOLERANCE = '50ms'
+
+def align_channels(df, channels, tolerance=DEFAULT_TOLERANCE, by='vehicle_id', reference=None,
+                   direction='nearest', dropna=True):
+    """
+    Align long-format rows into a wide frame with one column per channel
+
+    Args:
+        df: long-format rows (timestamp, vehicle_id, telemetry_name, telemetry_value)
+        channels: channels to align; the output has one column per channel
+        tolerance: maximum time difference for a match (pandas Timedelta string)
+        by: column grouping the merge (samples only match within a vehicle)
+        reference: channel whose timestamps define the rows (default: channels[0])
+        direction: 'nearest', 'backward' or 'forward' (see pandas.merge_asof)
+        dropna: drop rows where any channel found no match
+
+    Returns:
+        (aligned, match_rate): the wide DataFrame [by, timestamp, *channels]
+        and {channel: fraction of reference rows matched, 'all': all matched}
+    """
+    reference = reference or channels[0]
+    tolerance = pd.Timedelta(tolerance)
+
+    def channel_rows(name):
+        rows = df.loc[df['telemetry_name'] == name, [by, 'timestamp', 'telemetry_value']]
+        rows = rows.rename(columns={'telemetry_value': name})
+        rows[by] = rows[by].astype(str)
+        return rows.sort_values('timestamp', kind='stable')
+
+    aligned = channel_rows(reference)
+    for name in channels:
+        if name == reference:
+            continue
+        aligned = pd.merge_asof(aligned, channel_rows(name), on='timestamp', by=by,
+                                tolerance=tolerance, direction=direction)
+
+    aligned = aligned[[by, 'timestamp'] + list(channels)]
+
+    total = len(aligned)
+    matched = aligned[list(channels)].notna()
+    match_rate = {name: (float(matched[name].mean()) if total else 0.0) for name in channels}
+    match_rate['all'] = float(matched.all(axis=1).mean()) if total else 0.0
+
+    if dropna:
+        aligned = aligned.dropna(subset=list(channels))
+
+    return aligned.reset_index(drop=True), match_rate
@@ -0,0 +1,146 @@
+"""
+Byte-offset sidecar index for random access into raw telemetry CSVs
+
+The CSV is cut into blocks of roughly block_size bytes on line boundaries.
+For every (vehicle_id, lap, telemetry_name) key the index stores the byte
+ranges of the blocks containing it (adjacent blocks merged), so a lap can be
+read by seeking to a handful of ranges instead of scanning the whole file.
+"""
+import csv
+import io
+import json
+import os
+
+from telemetry_reader import read_telemetry
+
+KEY_COLUMNS = ['vehicle_id', 'lap', 'telemetry_name']
+BLOCK_SIZE = 1 << 20  # 1 MB
+
+# Race CSVs indexed, ingested and converted by the __main__ blocks: (csv_path, track, race)
+RACE_JOBS = [
+    ("../data/indianapolis/R1_indianapolis_motor_speedway_telemetry.csv", "indianapolis", "R1"),
+    ("../data/barber/R1_barber_telemetry_data.csv", "barber", "R1"),
+    ("../data/COTA/Race 1/R1_cota_telemetry_data.csv", "cota", "R1"),
+    ("../data/sebring/Sebring/Race 1/sebring_telemetry_R1.csv", "sebring", "R1"),
+    ("../data/road-america/Road America/Race 1/R1_road_america_telemetry_data.csv", "road-america", "R1"),
+]
+
+def index_path(csv_path):
+    """Sidecar file next to the CSV"""
+    return csv_path + '.idx.json'
+
+def _index_key(vehicle_id, lap, telemetry_name):
+    return f"{vehicle_id}|{lap}|{telemetry_name}"
+
+def _split_line(line):
+    if b'"' in line:
+        return next(csv.reader([line.decode('utf-8')]))
+    return line.decode('utf-8').rstrip('\r\n').split(',')
+
+def _add_block(ranges, keys, start, end):
+    for key in keys:
+        key_ranges = ranges.setdefault(key, [])
+        if key_ranges and key_ranges[-1][1] == start:
+            key_ranges[-1][1] = end
+        else:
+            key_ranges.append([start, end])
+
+def build_index(csv_path, block_size=BLOCK_SIZE):
+    """Build and save the sidecar index in one streaming pass over the CSV"""
+    print(f"  Indexing {csv_path}...")
+    stat = os.stat(csv_path)
+    ranges = {}
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        columns = _split_line(header)
+        positions = [columns.index(name) for name in KEY_COLUMNS]
+
+        offset = block_start = len(header)
+        block_keys = set()
+        for line in f:
+            fields = _split_line(line)
+            if len(fields) > max(positions):
+                vehicle_id, lap, name = (fields[i] for i in positions)
+                if lap:
+                    block_keys.add(_index_key(vehicle_id, int(float(lap)), name))
+            offset += len(line)
+
+            if offset - block_start >= block_size:
+                _add_block(ranges, block_keys, block_start, offset)
+                block_start = offset
+                block_keys = set()
+
+        _add_block(ranges, block_keys, block_start, offset)
+
+    index = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "block_size": block_size,
+        "header": header.decode('utf-8'),
+        "ranges": ranges
+    }
+    with open(index_path(csv_path), 'w') as f:
+        json.dump(index, f)
+
+    print(f"  Indexed {len(ranges)} keys")
+    return index
+
+def load_index(csv_path):
+    """Return the sidecar index, or None when missing or stale (size/mtime changed)"""
+    path = index_path(csv_path)
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+
+    with open(path, 'r') as f:
+        index = json.load(f)
+
+    stat = os.stat(csv_path)
+    if index.get("size") != stat.st_size or index.get("mtime") != stat.st_mtime:
+        return None
+    return index
+
+def _coalesce(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def read_lap_indexed(csv_path, index, lap_number, vehicle_id=None, channels=None,
+                     value_dtype='float32'):
+    """Read one lap by seeking to the indexed byte ranges only"""
+    wanted = []
+    for key, key_ranges in index["ranges"].items():
+        key_vehicle, key_lap, key_channel = key.split('|')
+        if int(key_lap) != lap_number:
+            continue
+        if vehicle_id is not None and key_vehicle != vehicle_id:
+            continue
+        if channels is not None and key_channel not in channels:
+            continue
+        wanted.extend(key_ranges)
+
+    blobs = [index["header"].encode('utf-8')]
+    with open(csv_path, 'rb') as f:
+        for start, end in _coalesce(wanted):
+            f.seek(start)
+            blobs.append(f.read(end - start))
+
+    df = read_telemetry(io.BytesIO(b''.join(blobs)), channels=channels, value_dtype=value_dtype)
+
+    # Blocks hold neighbouring rows too; keep only the requested ones
+    mask = df['lap'] == lap_number
+    if vehicle_id is not None:
+        mask &= df['vehicle_id'] == vehicle_id
+    return df[mask].reset_index(drop=True)
+
+if __name__ == "__main__":
+    for csv_path, _, _ in RACE_JOBS:
+        try:
+            build_index(csv_path)
+            print(f"✓ Index written: {index_path(csv_path)}\n")
+        except Exception as e:
+            print(f"✗ Failed to index {csv_path}: {e}\n")
@@ -2,110 +2,238 @@
 Generate 3D track mesh from GPS points
 """
 import json
+import os
 import numpy as np
-from parse_gps import parse_gps_from_telemetry, gps_to_track_points
+from build_cache import cached_stage, file_fingerprint, is_up_to_date, make_key, record_build
+from centerline import build_centerline
+from channel_align import DEFAULT_TOLERANCE
+from parse_gps import GPS_CHANNELS, parse_gps_from_telemetry, gps_to_track_points
+from smoothing import smooth
+from track_binary import binary_path, read_track_binary, write_track_binary
+from track_geometry import (cumulative_distance, curvature, headings, lod_indices,
+                            segment_corners, simplify_significance)
 
-def smooth_points(points, window=5):
-    """Smooth track points using moving average"""
-    if len(points) < window:
-        return points
-    
-    smoothed = []
-    for i in range(len(points)):
-        start = max(0, i - window // 2)
-        end = min(len(points), i + window // 2 + 1)
-        window_points = points[start:end]
-        
-        avg_x = sum(p[0] for p in window_points) / len(window_points)
-        avg_y = sum(p[1] for p in window_points) / len(window_points)
-        avg_z = sum(p[2] for p in window_points) / len(window_points)
-        
-        smoothed.append([avg_x, avg_y, avg_z])
-    
-    return smoothed
+# Bump when the pipeline or JSON layout changes so cached outputs and stages are rebuilt
+TRACK_FORMAT_VERSION = 10
 
-def downsample_points(points, target_count=500):
-    """Reduce number of points while maintaining shape"""
-    if len(points) <= target_count:
-        return points
-    
-    step = len(points) / target_count
-    indices = [int(i * step) for i in range(target_count)]
-    
-    return [points[i] for i in indices]
+# Centerline fusion settings (part of the centerline stage key)
+FUSE_PARAMS = {"method": "median", "spacing": 1.0}
+
+# Level-of-detail tiers written next to the track (point count, None = full resolution)
+LOD_COUNTS = [100, 500, 2000, None]
+
+TRACK_JOBS = [
+    ("../data/indianapolis/R1_indianapolis_motor_speedway_telemetry.csv", 
+     "../frontend/public/tracks/indianapolis.json", 
+     "Indianapolis Motor Speedway"),
+    ("../data/barber/R1_barber_telemetry_data.csv", 
+     "../frontend/public/tracks/barber.json", 
+     "Barber Motorsports Park"),
+    ("../data/COTA/Race 1/R1_cota_telemetry_data.csv", 
+     "../frontend/public/tracks/cota.json", 
+     "Circuit of the Americas"),
+    ("../data/sebring/Sebring/Race 1/sebring_telemetry_R1.csv", 
+     "../frontend/public/tracks/sebring.json", 
+     "Sebring International Raceway"),
+    ("../data/road-america/Road America/Race 1/R1_road_america_telemetry_data.csv", 
+     "../frontend/public/tracks/road-america.json", 
+     "Road America"),
+]
+
+def lod_path(output_path, count):
+    """Binary file of one level-of-detail tier, e.g. indianapolis.lod100.bin"""
+    return os.path.splitext(output_path)[0] + f".lod{count or 'full'}.bin"
+
+def _lod_tier(track_name, smoothed, along, significance, count, widths=None):
+    """One closed level-of-detail polyline; distances are stations of the full line"""
+    index, deviation = lod_indices(significance, count)
+    closed = np.append(index, index[:1])
+    tier = {
+        "name": track_name,
+        "points": smoothed[closed],
+        "distances": np.append(along[index], along[-1]),
+        "headings": headings(smoothed[index], closed=True)[np.arange(len(closed)) % len(index)],
+        "max_deviation": deviation
+    }
+    if widths is not None:
+        tier["widths"] = widths[closed]
+    return tier
+
+def _fused_stage(csv_path, workers=None):
+    result, laps = build_centerline(csv_path, workers=workers, **FUSE_PARAMS)
+    return {
+        "points": result["points"].tolist(),
+        "width": result["width"].tolist(),
+        "origin": list(result["origin"]),
+        "laps": [[str(vehicle_id), int(lap), reason] for vehicle_id, lap, reason in laps]
+    }
 
-def generate_track_json(csv_path, output_path, track_name):
+def generate_track_json(csv_path, output_path, track_name, lap_number=2, follow=False,
+                        tolerance=0.25, window=15, smoothing='moving_average', fuse=True,
+                        write_json=True, use_cache=True, workers=None):
     """
     Generate track JSON file from telemetry CSV
     
+    A compact binary copy (see track_binary.py) is always written next to
+    output_path with a .bin extension, along with one binary file per
+    LOD_COUNTS tier (listed under "lods" in the JSON).
+    
     Args:
         csv_path: Path to telemetry CSV
         output_path: Where to save JSON
         track_name: Name of track (e.g., "indianapolis")
+        lap_number: Lap whose GPS trace shapes the track (when not fusing)
+        follow: CSV is still growing; only parse rows appended since last run
+        tolerance: Maximum deviation in metres of the simplified track from the
+                   smoothed one (Ramer-Douglas-Peucker)
+        window: Smoothing window in GPS samples (applied before simplifying)
+        smoothing: Filter from smoothing.FILTERS ('moving_average', 'savgol', 'gaussian')
+        fuse: Fuse every clean lap of every vehicle into the centerline (see
+              centerline.py) and add per-point width estimates; a single lap
+              is used when following a growing CSV or when no lap is clean
+        write_json: Also write the (larger, slower to parse) JSON file
+        use_cache: Reuse unchanged stages from the build cache (see build_cache.py)
+        workers: Processes for fusing laps (see centerline.fuse_centerline; not
+                 part of any cache key)
     """
     print(f"Generating track: {track_name}")
     
-    # Parse GPS
-    print("  Parsing GPS data...")
-    gps_points = parse_gps_from_telemetry(csv_path)
-    print(f"  Found {len(gps_points)} GPS points")
+    # A growing CSV changes on every refresh; the tail cache handles that case
+    use_cache = use_cache and not follow
+    fuse = fuse and not follow
+    params = {"lap_number": lap_number, "tolerance": tolerance, "window": window,
+              "smoothing": smoothing, "fuse": fuse}
+    
+    def stage(name, key, compute):
+        return cached_stage(name, key, compute) if use_cache else compute()
+    
+    source = file_fingerprint(csv_path)
+    output_key = make_key("track", TRACK_FORMAT_VERSION, source, track_name, params)
+    lod_paths = [lod_path(output_path, count) for count in LOD_COUNTS]
+    outputs = [binary_path(output_path)] + lod_paths + ([output_path] if write_json else [])
+    if use_cache and all(is_up_to_date(path, output_key) for path in outputs):
+        print(f"✓ Track up to date: {output_path}")
+        if not write_json:
+            return read_track_binary(outputs[0], mmap=False)
+        with open(output_path, 'r') as f:
+            return json.load(f)
     
-    # Convert to track coordinates
-    print("  Converting to track coordinates...")
-    track_points = gps_to_track_points(gps_points)
+    widths = None
+    fused = None
+    if fuse:
+        # Centerline fused from all laps, 1 m stations, with lateral spread
+        print("  Fusing centerline from all laps...")
+        project_key = make_key("centerline", TRACK_FORMAT_VERSION, source, FUSE_PARAMS)
+        try:
+            fused = stage("centerline", project_key, lambda: _fused_stage(csv_path, workers))
+        except ValueError as e:
+            print(f"  ⚠ Cannot fuse laps ({e}), using lap {lap_number} instead")
     
-    # Downsample
-    print("  Downsampling...")
-    track_points = downsample_points(track_points, target_count=500)
+    if fused is not None:
+        track_points = fused["points"]
+        widths = np.asarray(fused["width"], dtype=np.float64)
+    else:
+        # Parse GPS
+        print("  Parsing GPS data...")
+        gps_key = make_key("gps", TRACK_FORMAT_VERSION, source, lap_number, GPS_CHANNELS,
+                           DEFAULT_TOLERANCE)
+        gps_points = stage("gps", gps_key, lambda: np.asarray(
+            parse_gps_from_telemetry(csv_path, lap_number, follow=follow), dtype=np.float64)).tolist()
+        print(f"  Found {len(gps_points)} GPS points")
+        
+        # Convert to track coordinates
+        print("  Converting to track coordinates...")
+        project_key = make_key("project", TRACK_FORMAT_VERSION, gps_key)
+        track_points = stage("project", project_key, lambda: np.asarray(
+            gps_to_track_points(gps_points), dtype=np.float64)).tolist()
     
-    # Smooth
+    # Smooth at full GPS resolution, wrapping around start/finish
     print("  Smoothing...")
-    track_points = smooth_points(track_points, window=5)
+    smooth_key = make_key("smooth", TRACK_FORMAT_VERSION, project_key, smoothing, window)
+    smoothed = stage("smooth", smooth_key, lambda: smooth(
+        np.asarray(track_points, dtype=np.float64).reshape(-1, 3), smoothing, window, closed=True))
+    
+    # Simplify: few points on straights, many in hairpins, never off by more than tolerance
+    print("  Simplifying...")
+    simplify_key = make_key("simplify", TRACK_FORMAT_VERSION, smooth_key)
+    significance = stage("simplify", simplify_key, lambda: simplify_significance(smoothed, closed=True))
+    kept = np.flatnonzero(significance > tolerance)
+    along = cumulative_distance(smoothed, closed=True)
+    track_points = smoothed[kept].tolist()
+    distances = along[kept].tolist()
+    
+    # Levels of detail from the same ranking: nested tiers sharing the same stations
+    print("  Writing levels of detail...")
+    lods = []
+    for count, path in zip(LOD_COUNTS, lod_paths):
+        if not len(smoothed):
+            break
+        tier = _lod_tier(track_name, smoothed, along, significance, count, widths)
+        write_track_binary(path, tier)
+        lods.append({"count": len(tier["points"]), "file": os.path.basename(path),
+                     "max_deviation": tier["max_deviation"]})
+    
+    # Smoothing keeps one point per input point, so widths follow the kept indices
+    if widths is not None:
+        widths = widths[kept].tolist()
+    
+    # Per-point geometry, computed once here instead of in every consumer
+    print("  Computing heading, curvature and corners...")
+    heading = headings(smoothed[kept], closed=True).tolist()
+    kappa = curvature(smoothed[kept], closed=True)
+    segments = segment_corners(distances, kappa, length=float(along[-1])) if track_points else []
+    kappa = kappa.tolist()
     
     # Close the loop (connect last point to first)
     if track_points:
         track_points.append(track_points[0])
+        distances.append(float(along[-1]))
+        heading.append(heading[0])
+        kappa.append(kappa[0])
+        if widths is not None:
+            widths.append(widths[0])
     
     # Create JSON structure
+    if fused is not None:
+        origin = fused["origin"]
+    else:
+        origin = gps_points[0] if gps_points else None
     track_data = {
         "name": track_name,
         "points": track_points,
+        "distances": distances,
+        "headings": heading,
+        "curvature": kappa,
+        "segments": segments,
+        "lods": lods,
         "metadata": {
             "point_count": len(track_points),
-            "source": csv_path
+            "source": csv_path,
+            # (lat, lon) of the local frame, to map other GPS samples onto the track
+            "origin": origin
         }
     }
+    if fused is not None:
+        track_data["widths"] = widths
+        track_data["metadata"]["laps_fused"] = sum(1 for lap in fused["laps"] if lap[2] is None)
     
     # Save to file
-    print(f"  Saving to {output_path}...")
-    with open(output_path, 'w') as f:
-        json.dump(track_data, f, indent=2)
+    print(f"  Saving to {outputs[0]}...")
+    write_track_binary(outputs[0], track_data)
+    if write_json:
+        print(f"  Saving to {output_path}...")
+        with open(output_path, 'w') as f:
+            json.dump(track_data, f, indent=2)
+    
+    if use_cache:
+        for path in outputs:
+            record_build(path, output_key, {"csv": source}, params)
     
     print(f"✓ Track generated: {len(track_points)} points")
     return track_data
 
 if __name__ == "__main__":
-    tracks = [
-        ("../data/indianapolis/R1_indianapolis_motor_speedway_telemetry.csv", 
-         "../frontend/public/tracks/indianapolis.json", 
-         "Indianapolis Motor Speedway"),
-        ("../data/barber/R1_barber_telemetry_data.csv", 
-         "../frontend/public/tracks/barber.json", 
-         "Barber Motorsports Park"),
-        ("../data/COTA/Race 1/R1_cota_telemetry_data.csv", 
-         "../frontend/public/tracks/cota.json", 
-         "Circuit of the Americas"),
-        ("../data/sebring/Sebring/Race 1/sebring_telemetry_R1.csv", 
-         "../frontend/public/tracks/sebring.json", 
-         "Sebring International Raceway"),
-        ("../data/road-america/Road America/Race 1/R1_road_america_telemetry_data.csv", 
-         "../frontend/public/tracks/road-america.json", 
-         "Road America"),
-    ]
-    
-    for csv_path, output_path, track_name in tracks:
-        try:
-            generate_track_json(csv_path, output_path, track_name)
-            print()
-        except Exception as e:
-            print(f"✗ Failed to generate {track_name}: {e}\n")
+    import functools
+    from build_all import build_stage
+    
+    build_stage("Tracks", functools.partial(generate_track_json, workers=1), TRACK_JOBS)
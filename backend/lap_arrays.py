@@ -0,0 +1,149 @@
+"""
+Memory-mapped per-channel arrays for zero-copy lap loading
+
+Layout (one directory per race and vehicle):
+    <array_root>/<track>/<race>/<vehicle_id>/timestamp.bin   int64 ns since epoch
+    <array_root>/<track>/<race>/<vehicle_id>/<channel>.bin   one raw array per channel
+    <array_root>/<track>/<race>/<vehicle_id>/header.json     dtypes, row count, lap offsets
+
+Rows are the pivoted (time x channel) samples of telemetry_pivot, so all
+channel arrays of a vehicle share the same row index; NaN marks a channel
+without a sample at that timestamp. Latitude and longitude are logged with
+slightly different timestamps, so they are aligned first (see
+channel_align.py): each latitude row carries its nearest longitude, and no
+row has one without the other.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+from channel_align import DEFAULT_TOLERANCE, align_channels
+from lap_extractor import iter_laps
+from telemetry_pivot import CHANNELS, pivot_channels
+
+ARRAY_ROOT = "../data/arrays"
+HEADER_FILE = "header.json"
+
+# GPS needs float64: float32 only resolves ~0.4 m at these latitudes
+CHANNEL_DTYPES = {name: 'float32' for name in CHANNELS}
+CHANNEL_DTYPES.update({'VBOX_Lat_Min': 'float64', 'VBOX_Long_Minutes': 'float64'})
+
+# Latitude rows carry the GPS fix; longitude is matched onto them
+GPS_PAIR = ['VBOX_Lat_Min', 'VBOX_Long_Minutes']
+
+def race_path(track, race, array_root=ARRAY_ROOT):
+    """Directory holding the vehicles of one race"""
+    return os.path.join(array_root, track, race)
+
+def vehicle_path(track, race, vehicle_id, array_root=ARRAY_ROOT):
+    """Directory holding the arrays of one vehicle in one race"""
+    return os.path.join(race_path(track, race, array_root), vehicle_id)
+
+def align_gps(df, timestamps, matrix, tolerance=DEFAULT_TOLERANCE):
+    """
+    Put each latitude's nearest longitude (within tolerance) on the latitude's
+    row of a pivoted lap; rows left without any value (a longitude alone) are
+    dropped. Returns (timestamps, matrix).
+    """
+    lat, lon = (CHANNELS.index(name) for name in GPS_PAIR)
+    aligned, _ = align_channels(df, GPS_PAIR, tolerance=tolerance, reference=GPS_PAIR[0], dropna=False)
+    rows = np.searchsorted(timestamps, aligned['timestamp'].to_numpy(dtype=timestamps.dtype))
+    matrix[:, lon] = np.nan
+    matrix[rows, lon] = aligned[GPS_PAIR[1]].to_numpy(dtype=matrix.dtype)
+    matrix[np.isnan(matrix[:, lon]), lat] = np.nan
+    keep = ~np.isnan(matrix).all(axis=1)
+    return timestamps[keep], matrix[keep]
+
+def build_arrays(csv_path, track, race, array_root=ARRAY_ROOT):
+    """
+    Write per-vehicle channel arrays for a whole race in one pass over the CSV
+
+    Each lap is pivoted and appended to its vehicle's files as soon as the
+    lap is complete, so memory use stays at about one lap per vehicle.
+    """
+    out_dir = race_path(track, race, array_root)
+    print(f"Building arrays {csv_path} -> {out_dir}")
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+
+    headers = {}
+    for vehicle_id, lap, df in iter_laps(csv_path, channels=CHANNELS, value_dtype='float64'):
+        timestamps, matrix = pivot_channels(df, CHANNELS, dtype=np.float64)
+        if len(timestamps) == 0:
+            continue
+        timestamps, matrix = align_gps(df, timestamps, matrix)
+
+        vehicle_dir = os.path.join(out_dir, vehicle_id)
+        if vehicle_id not in headers:
+            os.makedirs(vehicle_dir)
+            headers[vehicle_id] = {
+                "vehicle_id": vehicle_id,
+                "rows": 0,
+                "dtypes": {"timestamp": "int64", **CHANNEL_DTYPES},
+                "laps": {}
+            }
+        header = headers[vehicle_id]
+
+        with open(os.path.join(vehicle_dir, 'timestamp.bin'), 'ab') as f:
+            f.write(timestamps.astype('datetime64[ns]').astype(np.int64).tobytes())
+        for i, name in enumerate(CHANNELS):
+            with open(os.path.join(vehicle_dir, f'{name}.bin'), 'ab') as f:
+                f.write(matrix[:, i].astype(CHANNEL_DTYPES[name]).tobytes())
+
+        start = header["rows"]
+        header["rows"] += len(timestamps)
+        header["laps"].setdefault(str(lap), []).append([start, header["rows"]])
+
+    for vehicle_id, header in headers.items():
+        with open(os.path.join(out_dir, vehicle_id, HEADER_FILE), 'w') as f:
+            json.dump(header, f, indent=2)
+
+    print(f"✓ Arrays written for {len(headers)} vehicles")
+    return out_dir
+
+def read_header(vehicle_dir):
+    with open(os.path.join(vehicle_dir, HEADER_FILE), 'r') as f:
+        return json.load(f)
+
+def open_arrays(vehicle_dir, channels=None, header=None):
+    """Memory-map whole-race arrays of one vehicle (nothing is read yet)"""
+    header = header or read_header(vehicle_dir)
+    names = ['timestamp'] + list(CHANNELS if channels is None else channels)
+    return {
+        name: np.memmap(os.path.join(vehicle_dir, f'{name}.bin'), dtype=header["dtypes"][name],
+                        mode='r', shape=(header["rows"],))
+        for name in names
+    }
+
+def load_lap_arrays(vehicle_dir, lap_number, channels=None):
+    """
+    Return {name: array} for one lap, including 'timestamp'
+
+    Arrays are zero-copy views into the memory-mapped files; only the pages
+    of this lap are ever read. A lap stored in several pieces (bogus lap
+    counters in the source) is concatenated, which does copy.
+    """
+    header = read_header(vehicle_dir)
+    ranges = header["laps"].get(str(lap_number))
+    if not ranges:
+        return None
+
+    arrays = open_arrays(vehicle_dir, channels, header)
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        return {name: array[start:end] for name, array in arrays.items()}
+    return {name: np.concatenate([array[start:end] for start, end in ranges])
+            for name, array in arrays.items()}
+
+if __name__ == "__main__":
+    from csv_index import RACE_JOBS
+
+    for csv_path, track, race in RACE_JOBS:
+        try:
+            build_arrays(csv_path, track, race)
+            print()
+        except Exception as e:
+            print(f"✗ Failed to build arrays for {track} {race}: {e}\n")
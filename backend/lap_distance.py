@@ -0,0 +1,150 @@
+"""
+Distance-domain lap representation
+
+Laps of different cars (or of the same car) are sampled at different times,
+so comparing them in the time domain means a nearest-time search for every
+sample. Laptrigger_lapdist_dls gives the distance along the lap; resampling
+every channel onto one fixed distance grid (e.g. every metre) turns lap
+comparisons, ghost cars and time deltas into element-wise array operations:
+
+    dist_a, elapsed_a, a = load_distance_lap(csv_path, 2, 'GR86-002-2')
+    dist_b, elapsed_b, b = load_distance_lap(csv_path, 2, 'GR86-057-57')
+    distance, delta = time_delta((dist_a, elapsed_a), (dist_b, elapsed_b))
+"""
+import numpy as np
+from build_cache import cached_stage, file_fingerprint, make_key
+from telemetry_pivot import (CHANNELS, DEFAULT_INTERPOLATION, pivot_channels, resample_column,
+                             timestamps_to_seconds)
+from telemetry_store import load_lap
+
+LAPDIST_CHANNEL = 'Laptrigger_lapdist_dls'
+DISTANCE_STEP = 1.0   # metres
+
+# A lapdist drop larger than this (metres) is the reset at the start/finish line
+LAPDIST_RESET_M = 100.0
+
+# Bump when the resampling changes so cached distance-domain laps are rebuilt
+DISTANCE_FORMAT_VERSION = 2
+
+def lap_rows(lapdist):
+    """
+    Rows (start, stop) of the lap proper, from its lapdist column
+
+    A lap's rows can begin with samples left over from the previous lap
+    (before lapdist resets at the line) or end with the next lap's. The
+    resets split the lapdist samples into runs; the run with the most
+    samples is the lap, and rows outside it are dropped.
+    """
+    valid = np.flatnonzero(~np.isnan(lapdist))
+    if not len(valid):
+        raise ValueError(f"Lap has no {LAPDIST_CHANNEL} samples")
+    resets = np.flatnonzero(np.diff(lapdist[valid]) < -LAPDIST_RESET_M) + 1
+    bounds = np.concatenate([[0], resets, [len(valid)]])
+    run = int(np.argmax(np.diff(bounds)))
+    start = valid[bounds[run]] if run > 0 else 0
+    stop = valid[bounds[run + 1] - 1] + 1 if run < len(bounds) - 2 else len(lapdist)
+    return start, stop
+
+def lap_distance(t, lapdist):
+    """
+    Distance along the lap at every time t, from the (sparse) lapdist samples
+
+    Interpolated linearly between samples and made non-decreasing, so a noisy
+    sample never moves the car backwards. Samples from another lap must be
+    cut off first (see lap_rows): a stale one would hold the running
+    maximum for the whole lap.
+    """
+    valid = ~np.isnan(lapdist)
+    if not valid.any():
+        raise ValueError(f"Lap has no {LAPDIST_CHANNEL} samples")
+    distance = np.interp(t, t[valid], lapdist[valid])
+    return np.maximum.accumulate(distance)
+
+def to_distance_domain(timestamps, matrix, channels=CHANNELS, step=DISTANCE_STEP, methods=None):
+    """
+    Resample a pivoted lap (see telemetry_pivot.pivot_channels) onto a fixed distance grid
+
+    Each channel is interpolated from its own valid samples only, using
+    methods[channel] (falling back to DEFAULT_INTERPOLATION, then linear).
+    channels must include LAPDIST_CHANNEL. Rows from before the lapdist
+    reset, or after the next one, are dropped (see lap_rows).
+
+    Returns (distance, elapsed_s, resampled): grid distances in metres, seconds
+    since the lap's first sample at which the car passed each of them, and a
+    (len(distance) x channel) matrix of the input dtype.
+    """
+    methods = {**DEFAULT_INTERPOLATION, **(methods or {})}
+
+    if len(timestamps) == 0:
+        return np.zeros(0), np.zeros(0), matrix[:0]
+
+    lapdist = matrix[:, list(channels).index(LAPDIST_CHANNEL)].astype(np.float64)
+    start, stop = lap_rows(lapdist)
+    timestamps, matrix, lapdist = timestamps[start:stop], matrix[start:stop], lapdist[start:stop]
+    t = timestamps_to_seconds(timestamps)
+    distance = lap_distance(t, lapdist)
+
+    # Keep the first sample at each distance so the grid axis is strictly increasing
+    first = np.concatenate([[True], np.diff(distance) > 0])
+    grid = np.arange(np.ceil(distance[0] / step) * step, distance[-1] + step / 2, step)
+
+    elapsed = np.interp(grid, distance[first], t[first])
+    resampled = np.empty((len(grid), len(channels)), dtype=matrix.dtype)
+    for i, name in enumerate(channels):
+        values = matrix[:, i].astype(np.float64)
+        values[~first] = np.nan
+        resampled[:, i] = resample_column(distance, values, grid, methods.get(name, 'linear'))
+
+    return grid, elapsed, resampled
+
+def load_distance_lap(csv_path, lap_number, vehicle_id=None, channels=CHANNELS, step=DISTANCE_STEP,
+                      use_cache=True):
+    """
+    One vehicle's lap on a fixed distance grid (see to_distance_domain)
+
+    vehicle_id defaults to the first vehicle seen on that lap. The result is
+    kept in the build cache, keyed on the CSV fingerprint and the arguments.
+    """
+    channels = list(channels)
+    if LAPDIST_CHANNEL not in channels:
+        channels.append(LAPDIST_CHANNEL)
+
+    def compute():
+        # float64: GPS columns need it, and the cache keeps a single array
+        df = load_lap(csv_path, lap_number, vehicle_id=vehicle_id, channels=channels,
+                      value_dtype='float64')
+        if df.empty:
+            raise ValueError(f"No telemetry for lap {lap_number} in {csv_path}")
+        df = df[df['vehicle_id'] == (vehicle_id or df['vehicle_id'].iloc[0])]
+        timestamps, matrix = pivot_channels(df, channels, dtype=np.float64)
+        distance, elapsed, resampled = to_distance_domain(timestamps, matrix, channels, step)
+        return np.column_stack([distance, elapsed, resampled])
+
+    if use_cache:
+        key = make_key("distance-lap", DISTANCE_FORMAT_VERSION, file_fingerprint(csv_path), lap_number,
+                       vehicle_id, channels, step)
+        table = cached_stage("distance-lap", key, compute)
+    else:
+        table = compute()
+
+    return table[:, 0], table[:, 1], table[:, 2:]
+
+def time_delta(reference, lap):
+    """
+    Time lost (positive) or gained (negative) by lap against reference at every distance
+
+    Both are (distance, elapsed_s) on grids with the same step; the result
+    covers the distances they share, with both laps timed from the first
+    shared one: (distance, delta_s).
+    """
+    ref_distance, ref_elapsed = reference[0], reference[1]
+    distance, elapsed = lap[0], lap[1]
+    step = ref_distance[1] - ref_distance[0] if len(ref_distance) > 1 else DISTANCE_STEP
+
+    stations, ref_idx, lap_idx = np.intersect1d(np.round(ref_distance / step).astype(np.int64),
+                                                np.round(distance / step).astype(np.int64),
+                                                return_indices=True)
+    if len(stations) == 0:
+        return np.zeros(0), np.zeros(0)
+    delta = (elapsed[lap_idx] - elapsed[lap_idx[0]]) - (ref_elapsed[ref_idx] - ref_elapsed[ref_idx[0]])
+    return stations * step, delta
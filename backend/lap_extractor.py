@@ -0,0 +1,39 @@
+"""
+Single-pass extraction of every (vehicle_id, lap) group from a telemetry CSV
+"""
+from telemetry_reader import INVALID_LAP, concat_chunks, read_telemetry_chunks
+
+def iter_laps(csv_path, channels=None, chunksize=100000, value_dtype='float32'):
+    """
+    Yield (vehicle_id, lap, DataFrame) for every lap of every vehicle
+
+    The CSV is read once. Rows are time-ordered, so a lap is complete as soon
+    as its vehicle has moved on to another lap and the lap received no rows in
+    the current chunk; it is yielded and dropped right away, which keeps memory
+    bounded to roughly one lap per vehicle. A lap whose rows reappear after it
+    was yielded (e.g. bogus lap counters) is yielded again as another piece.
+    """
+    pending = {}
+    current_lap = {}
+
+    for chunk in read_telemetry_chunks(csv_path, chunksize=chunksize, channels=channels,
+                                       value_dtype=value_dtype):
+        chunk = chunk[chunk['lap'] != INVALID_LAP]
+
+        seen = set()
+        for (vehicle_id, lap), group in chunk.groupby(['vehicle_id', 'lap'], sort=False, observed=True):
+            key = (vehicle_id, int(lap))
+            pending.setdefault(key, []).append(group)
+            seen.add(key)
+
+        # Last row wins: that is the lap each vehicle is on at the end of the chunk
+        last_rows = chunk.drop_duplicates('vehicle_id', keep='last')
+        current_lap.update(zip(last_rows['vehicle_id'], last_rows['lap'].astype(int)))
+
+        finished = [key for key in pending
+                    if key not in seen and current_lap.get(key[0]) != key[1]]
+        for key in finished:
+            yield key[0], key[1], concat_chunks(pending.pop(key))
+
+    for key, frames in pending.items():
+        yield key[0], key[1], concat_chunks(frames)
@@ -0,0 +1,141 @@
+"""
+Map matching of GPS-tagged telemetry samples onto the track polyline
+
+Every sample is projected onto its nearest track segment, which gives its
+station distance along the track, its signed lateral offset (positive to the
+left of the driving direction) and the segment index. With SciPy installed,
+candidate segments come from a KD-tree over points sampled along every segment
+(at most SAMPLE_SPACING apart): the nearest segment always has a sample within
+the distance to the nearest sample plus half the spacing, so a ball query of
+that radius cannot miss it, however long the segments are. Without SciPy a
+chunked brute-force search tests every segment.
+"""
+import numpy as np
+from parse_gps import project_lat_lon
+from track_geometry import cumulative_distance
+
+try:
+    from scipy.spatial import cKDTree
+    has_scipy = True
+except ImportError:
+    has_scipy = False
+
+SAMPLE_SPACING = 5.0     # metres between indexed samples along a segment
+BRUTE_FORCE_CHUNK = 512
+
+def segment_index(track_points, closed=True):
+    """
+    Spatial index over a track polyline
+
+    Args:
+        track_points: (N, 3) track points; for a closed track the last point may
+                      repeat the first (as in the track JSON)
+        closed: the last point connects back to the first
+
+    Returns:
+        dict with segment 'starts', 'vectors', 'lengths', 'stations' (distance
+        of each segment start), 'length' (total), and the sample 'tree' (or
+        None) with each sample's segment ('owners') and the search 'reach'
+    """
+    points = np.asarray(track_points, dtype=np.float64).reshape(-1, 3)
+    if closed and len(points) > 1 and np.array_equal(points[0], points[-1]):
+        points = points[:-1]
+    if len(points) < 2:
+        raise ValueError("A track needs at least two points")
+
+    ends = np.roll(points, -1, axis=0) if closed else points[1:]
+    starts = points if closed else points[:-1]
+    vectors = ends - starts
+    lengths = np.linalg.norm(vectors, axis=1)
+    stations = cumulative_distance(points, closed=closed)
+
+    tree, owners, reach = None, None, 0.0
+    if has_scipy:
+        # Evenly spaced samples along each segment, at their pieces' midpoints
+        pieces = np.maximum(np.ceil(lengths / SAMPLE_SPACING), 1).astype(np.int64)
+        owners = np.repeat(np.arange(len(starts)), pieces)
+        first = np.cumsum(pieces) - pieces
+        fraction = (np.arange(len(owners)) - first[owners] + 0.5) / pieces[owners]
+        tree = cKDTree(starts[owners] + fraction[:, None] * vectors[owners])
+        # Farthest any point of a segment is from its nearest sample
+        reach = float(np.max(lengths / (2 * pieces)))
+
+    return {
+        "starts": starts,
+        "vectors": vectors,
+        "lengths": lengths,
+        "stations": stations[:len(starts)],
+        "length": float(stations[-1]),
+        "closed": closed,
+        "tree": tree,
+        "owners": owners,
+        "reach": reach
+    }
+
+def _project(index, points, segments):
+    """Project points (P, 3) onto segments (P,): fraction along and squared distance"""
+    starts = index["starts"][segments]
+    vectors = index["vectors"][segments]
+    lengths_sq = np.einsum('pd,pd->p', vectors, vectors)
+    t = np.einsum('pd,pd->p', points - starts, vectors)
+    t = np.clip(t / np.where(lengths_sq > 0, lengths_sq, 1.0), 0.0, 1.0)
+    nearest = starts + t[:, None] * vectors
+    return t, np.sum((points - nearest) ** 2, axis=1)
+
+def _candidates(index, points):
+    """Candidate (point row, segment) pairs, each pair once; every row has at least one"""
+    count = len(index["starts"])
+    if index["tree"] is None:
+        return np.repeat(np.arange(len(points)), count), np.tile(np.arange(count), len(points))
+
+    tree = index["tree"]
+    nearest, _ = tree.query(points)
+    found = tree.query_ball_point(points, nearest + index["reach"] + 1e-6)
+    sizes = np.fromiter((len(f) for f in found), dtype=np.int64, count=len(found))
+    samples = np.fromiter((i for f in found for i in f), dtype=np.int64, count=int(sizes.sum()))
+    pairs = np.unique(np.repeat(np.arange(len(points)), sizes) * count + index["owners"][samples])
+    return pairs // count, pairs % count
+
+def match_points(index, points):
+    """
+    Match track-frame points (M, 3) to the track
+
+    Returns:
+        dict of arrays (M,): 'distance' along the track, signed 'offset' in
+        metres, 'segment' index and 'position' (M, 3) on the track
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    segment = np.empty(len(points), dtype=np.int64)
+    fraction = np.empty(len(points))
+    squared = np.empty(len(points))
+
+    # Without a tree every point tests every segment; bound memory per chunk
+    chunk = len(points) if index["tree"] is not None else BRUTE_FORCE_CHUNK
+    for lo in range(0, len(points), max(chunk, 1)):
+        part = points[lo:lo + chunk]
+        rows, candidates = _candidates(index, part)
+        t, dist_sq = _project(index, part[rows], candidates)
+        # Closest candidate of each row
+        order = np.lexsort((dist_sq, rows))
+        best = order[np.unique(rows[order], return_index=True)[1]]
+        segment[lo:lo + chunk] = candidates[best]
+        fraction[lo:lo + chunk] = t[best]
+        squared[lo:lo + chunk] = dist_sq[best]
+
+    vectors = index["vectors"][segment]
+    position = index["starts"][segment] + fraction[:, None] * vectors
+    # Sign from the cross product in the x/z plane, as centerline offsets
+    delta = points - position
+    side = np.sign(vectors[:, 0] * delta[:, 2] - vectors[:, 2] * delta[:, 0])
+    distance = index["stations"][segment] + fraction * index["lengths"][segment]
+
+    return {
+        "distance": np.mod(distance, index["length"]) if index["closed"] else distance,
+        "offset": side * np.sqrt(squared),
+        "segment": segment,
+        "position": position
+    }
+
+def match_lat_lon(index, lat, lon, origin, method='equirectangular'):
+    """Project lat/lon samples into the track frame (see parse_gps.project_lat_lon) and match them"""
+    return match_points(index, project_lat_lon(lat, lon, origin, method))
@@ -1,46 +1,66 @@
 """
 Parse GPS coordinates from telemetry CSV (optimized for large files)
 """
-import pandas as pd
 import numpy as np
+from channel_align import DEFAULT_TOLERANCE, align_channels
+from lap_arrays import load_lap_arrays
+from lap_extractor import iter_laps
+from telemetry_store import load_lap
 
-def parse_gps_from_telemetry(csv_path, lap_number=2):
+GPS_CHANNELS = ['VBOX_Lat_Min', 'VBOX_Long_Minutes']
+
+def gps_points_from_rows(df, tolerance=DEFAULT_TOLERANCE):
+    """Pair lat/lon samples of one vehicle's lap (long-format rows)"""
+    # As-of merge: lon samples within tolerance of each lat sample still pair up
+    aligned, match_rate = align_channels(df, GPS_CHANNELS, tolerance=tolerance)
+    if match_rate['all'] < 1.0:
+        print(f"  GPS lat/lon match rate: {match_rate['all']:.1%}")
+    
+    # Convert to list of tuples
+    return list(zip(aligned['VBOX_Lat_Min'], aligned['VBOX_Long_Minutes']))
+
+def parse_gps_from_telemetry(csv_path, lap_number=2, vehicle_id=None, follow=False):
     """
     Extract GPS coordinates from telemetry CSV
     Only reads GPS data, not entire file
+    
+    Uses a single vehicle: vehicle_id, or the first vehicle seen on that lap.
+    follow=True only parses rows appended since the last call (growing CSV).
     """
     print(f"  Reading GPS data from lap {lap_number}...")
     
-    # Read only GPS rows (much faster than reading entire file)
-    chunks = []
-    for chunk in pd.read_csv(csv_path, chunksize=100000):
-        # Filter for specific lap and GPS data only
-        gps_chunk = chunk[
-            (chunk['lap'] == lap_number) & 
-            (chunk['telemetry_name'].isin(['VBOX_Lat_Min', 'VBOX_Long_Minutes']))
-        ]
-        if not gps_chunk.empty:
-            chunks.append(gps_chunk)
-    
-    if not chunks:
+    # Read only GPS rows (from the columnar store when it has been built)
+    df = load_lap(csv_path, lap_number, vehicle_id=vehicle_id, channels=GPS_CHANNELS,
+                  value_dtype='float64', follow=follow)
+    
+    if df.empty:
         print(f"  No GPS data found for lap {lap_number}")
         return []
     
-    df = pd.concat(chunks, ignore_index=True)
-    
-    # Pivot to get lat/lon in same row
-    lat_data = df[df['telemetry_name'] == 'VBOX_Lat_Min'][['timestamp', 'telemetry_value']]
-    lon_data = df[df['telemetry_name'] == 'VBOX_Long_Minutes'][['timestamp', 'telemetry_value']]
+    if vehicle_id is None:
+        vehicle_id = df['vehicle_id'].iloc[0]
+        df = df[df['vehicle_id'] == vehicle_id]
     
-    # Merge on timestamp
-    merged = pd.merge(lat_data, lon_data, on='timestamp', suffixes=('_lat', '_lon'))
-    
-    # Convert to list of tuples
-    gps_points = list(zip(merged['telemetry_value_lat'], merged['telemetry_value_lon']))
+    gps_points = gps_points_from_rows(df)
     
-    print(f"  Found {len(gps_points)} GPS points")
+    print(f"  Found {len(gps_points)} GPS points ({vehicle_id})")
     return gps_points
 
+def iter_gps_laps(csv_path):
+    """Yield (vehicle_id, lap, gps_points) for every lap in one pass over the CSV"""
+    for vehicle_id, lap, df in iter_laps(csv_path, channels=GPS_CHANNELS, value_dtype='float64'):
+        yield vehicle_id, lap, gps_points_from_rows(df)
+
+def load_gps_lap(vehicle_dir, lap_number):
+    """
+    Zero-copy (lat, lon) views of one lap from the memory-mapped arrays
+    (see lap_arrays.py); both NaN on rows without a GPS fix
+    """
+    arrays = load_lap_arrays(vehicle_dir, lap_number, channels=GPS_CHANNELS)
+    if arrays is None:
+        return None, None
+    return arrays['VBOX_Lat_Min'], arrays['VBOX_Long_Minutes']
+
 def lat_lon_to_meters(lat, lon, origin_lat, origin_lon):
     """Convert lat/lon to local Cartesian coordinates (meters)"""
     R = 6371000  # Earth radius
@@ -55,16 +75,95 @@ def lat_lon_to_meters(lat, lon, origin_lat, origin_lon):
     
     return x, y
 
-def gps_to_track_points(gps_points):
-    """Convert GPS coordinates to local track coordinates"""
-    if not gps_points:
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+def track_origin(lat, lon):
+    """
+    Shared origin for a track: centre of the lat/lon bounding box
+
+    Pass the samples of every lap/vehicle so they all land in the same frame.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return (float(np.nanmin(lat) + np.nanmax(lat)) / 2, float(np.nanmin(lon) + np.nanmax(lon)) / 2)
+
+def _geodetic_to_ecef(lat_rad, lon_rad):
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat_rad) ** 2)
+    return (n * np.cos(lat_rad) * np.cos(lon_rad),
+            n * np.cos(lat_rad) * np.sin(lon_rad),
+            n * (1 - WGS84_E2) * np.sin(lat_rad))
+
+def project_lat_lon(lat, lon, origin, method='equirectangular'):
+    """
+    Project lat/lon arrays to local track coordinates in one vectorized call
+    
+    Args:
+        lat, lon: arrays of degrees (same shape)
+        origin: (lat, lon) of the local frame, e.g. from track_origin()
+        method: 'equirectangular' (spherical, as lat_lon_to_meters) or 'enu'
+                (WGS84 east/north about the origin)
+    
+    Returns:
+        (N, 3) float64 array of [x (east), 0, z (north)] in meters
+    """
+    lat_rad = np.radians(np.asarray(lat, dtype=np.float64))
+    lon_rad = np.radians(np.asarray(lon, dtype=np.float64))
+    origin_lat_rad, origin_lon_rad = np.radians(origin[0]), np.radians(origin[1])
+    
+    points = np.zeros((lat_rad.size, 3))
+    if method == 'equirectangular':
+        R = 6371000  # Earth radius
+        points[:, 0] = R * (lon_rad.ravel() - origin_lon_rad) * np.cos(origin_lat_rad)
+        points[:, 2] = R * (lat_rad.ravel() - origin_lat_rad)
+    elif method == 'enu':
+        x, y, z = _geodetic_to_ecef(lat_rad.ravel(), lon_rad.ravel())
+        x0, y0, z0 = _geodetic_to_ecef(origin_lat_rad, origin_lon_rad)
+        dx, dy, dz = x - x0, y - y0, z - z0
+        sin_lat, cos_lat = np.sin(origin_lat_rad), np.cos(origin_lat_rad)
+        sin_lon, cos_lon = np.sin(origin_lon_rad), np.cos(origin_lon_rad)
+        points[:, 0] = -sin_lon * dx + cos_lon * dy
+        points[:, 2] = -sin_lat * cos_lon * dx - sin_lat * sin_lon * dy + cos_lat * dz
+    else:
+        raise ValueError(f"Unknown projection method: {method}")
+    
+    return points
+
+def project_laps(laps, origin=None, method='equirectangular'):
+    """
+    Project many laps/vehicles at once into one shared frame
+    
+    Args:
+        laps: list of (N_i, 2) lat/lon arrays (or lists of (lat, lon) tuples)
+        origin: shared (lat, lon); defaults to track_origin() of all laps
+    
+    Returns:
+        list of (N_i, 3) arrays, one per lap
+    """
+    arrays = [np.asarray(lap, dtype=np.float64).reshape(-1, 2) for lap in laps]
+    if not arrays:
         return []
     
-    origin_lat, origin_lon = gps_points[0]
+    stacked = np.concatenate(arrays)
+    if origin is None:
+        origin = track_origin(stacked[:, 0], stacked[:, 1])
+    
+    points = project_lat_lon(stacked[:, 0], stacked[:, 1], origin, method)
+    return np.split(points, np.cumsum([len(a) for a in arrays])[:-1])
+
+def gps_to_track_points(gps_points, origin=None, method='equirectangular'):
+    """
+    Convert GPS coordinates to local track coordinates
+    
+    origin defaults to the first point; pass a shared track_origin() to put
+    several laps in the same frame.
+    """
+    if len(gps_points) == 0:
+        return []
     
-    track_points = []
-    for lat, lon in gps_points:
-        x, z = lat_lon_to_meters(lat, lon, origin_lat, origin_lon)
-        track_points.append([x, 0, z])
+    gps = np.asarray(gps_points, dtype=np.float64).reshape(-1, 2)
+    if origin is None:
+        origin = gps[0]
     
-    return track_points
+    return project_lat_lon(gps[:, 0], gps[:, 1], origin, method).tolist()
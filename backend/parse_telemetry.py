@@ -1,83 +1,167 @@
 """
 Parse telemetry data from CSV and sync with GPS track
 """
-import pandas as pd
 import json
+import os
 import numpy as np
+from channel_align import DEFAULT_TOLERANCE, align_channels
+from build_cache import cached_stage, file_fingerprint, is_up_to_date, make_key, record_build
+from lap_arrays import load_lap_arrays
+from lap_extractor import iter_laps
+from map_matching import match_lat_lon, segment_index
+from telemetry_store import load_lap
+from track_binary import binary_path, read_track_binary
 
-def parse_telemetry_data(csv_path, lap_number=2):
-    """Extract telemetry for a specific lap"""
+# Bump when the parsing, alignment or JSON layout changes so cached stages and outputs are rebuilt
+TELEMETRY_FORMAT_VERSION = 2
+
+POINT_CHANNELS = ['speed', 'nmot', 'gear', 'Steering_Angle', 'VBOX_Lat_Min', 'VBOX_Long_Minutes']
+
+TELEMETRY_JOBS = [
+    ("../data/indianapolis/R1_indianapolis_motor_speedway_telemetry.csv",
+     "../frontend/public/tracks/indianapolis.json",
+     "../frontend/public/telemetry/indianapolis.json",
+     "Indianapolis Motor Speedway"),
+    ("../data/barber/R1_barber_telemetry_data.csv",
+     "../frontend/public/tracks/barber.json",
+     "../frontend/public/telemetry/barber.json",
+     "Barber Motorsports Park"),
+]
+
+def telemetry_points_from_rows(df, tolerance=DEFAULT_TOLERANCE):
+    """Build telemetry samples from one vehicle's lap (long-format rows)"""
+    # One row per GPS latitude sample, every other channel matched as-of within tolerance
+    aligned, _ = align_channels(df, POINT_CHANNELS, tolerance=tolerance, reference='VBOX_Lat_Min',
+                                dropna=False)
+    matrix = aligned[POINT_CHANNELS].to_numpy(dtype=np.float64)
+    speed, rpm, gear, steering, lat, lon = matrix.T
+    
+    # Only samples with a GPS fix; index stays the position in the GPS timeline
+    keep = ~np.isnan(lat) & ~np.isnan(lon) & (lat != 0) & (lon != 0)
+    
+    columns = {
+        'index': np.flatnonzero(keep),
+        'speed': np.nan_to_num(speed[keep], nan=0),
+        'rpm': np.nan_to_num(rpm[keep], nan=0),
+        'gear': np.nan_to_num(gear[keep], nan=1).astype(int),
+        'steering': np.nan_to_num(steering[keep], nan=0),
+        'lat': lat[keep],
+        'lon': lon[keep]
+    }
+    
+    # Build telemetry array
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[n].tolist() for n in names))]
+
+def parse_telemetry_data(csv_path, lap_number=2, vehicle_id=None, follow=False):
+    """
+    Extract telemetry for a specific lap
+    
+    Uses a single vehicle: vehicle_id, or the first vehicle seen on that lap.
+    follow=True only parses rows appended since the last call (growing CSV).
+    """
     print(f"  Reading telemetry for lap {lap_number}...")
     
-    chunks = []
-    for chunk in pd.read_csv(csv_path, chunksize=100000):
-        lap_chunk = chunk[chunk['lap'] == lap_number]
-        if not lap_chunk.empty:
-            chunks.append(lap_chunk)
+    # float64: a float32 lat/lon is only good to ~0.5 m, which would show up as lateral offset
+    df = load_lap(csv_path, lap_number, vehicle_id=vehicle_id, channels=POINT_CHANNELS,
+                  value_dtype='float64', follow=follow)
     
-    if not chunks:
+    if df.empty:
         print(f"  No telemetry found for lap {lap_number}")
         return []
     
-    df = pd.concat(chunks, ignore_index=True)
+    if vehicle_id is None:
+        vehicle_id = df['vehicle_id'].iloc[0]
+        df = df[df['vehicle_id'] == vehicle_id]
     
-    # Pivot telemetry data
-    telemetry = {}
-    for name in ['speed', 'nmot', 'gear', 'Steering_Angle', 'VBOX_Lat_Min', 'VBOX_Long_Minutes']:
-        data = df[df['telemetry_name'] == name][['timestamp', 'telemetry_value']]
-        if not data.empty:
-            telemetry[name] = dict(zip(data['timestamp'], data['telemetry_value']))
+    result = telemetry_points_from_rows(df)
     
-    # Get all timestamps
-    timestamps = sorted(set(df['timestamp']))
-    
-    # Build telemetry array
-    result = []
-    for i, ts in enumerate(timestamps):
-        point = {
-            'index': i,
-            'speed': telemetry.get('speed', {}).get(ts, 0),
-            'rpm': telemetry.get('nmot', {}).get(ts, 0),
-            'gear': int(telemetry.get('gear', {}).get(ts, 1)),
-            'steering': telemetry.get('Steering_Angle', {}).get(ts, 0),
-            'lat': telemetry.get('VBOX_Lat_Min', {}).get(ts),
-            'lon': telemetry.get('VBOX_Long_Minutes', {}).get(ts)
-        }
-        if point['lat'] and point['lon']:
-            result.append(point)
-    
-    print(f"  Found {len(result)} telemetry points")
+    print(f"  Found {len(result)} telemetry points ({vehicle_id})")
     return result
 
-def generate_telemetry_json(csv_path, track_json_path, output_path, track_name):
-    """Generate telemetry JSON synced with track"""
+def iter_telemetry_laps(csv_path):
+    """Yield (vehicle_id, lap, telemetry_points) for every lap in one pass over the CSV"""
+    for vehicle_id, lap, df in iter_laps(csv_path, channels=POINT_CHANNELS, value_dtype='float64'):
+        yield vehicle_id, lap, telemetry_points_from_rows(df)
+
+def load_telemetry_lap(vehicle_dir, lap_number):
+    """
+    Zero-copy views of one lap's timestamp and POINT_CHANNELS from the
+    memory-mapped arrays (see lap_arrays.py), or None if the lap is missing
+    """
+    return load_lap_arrays(vehicle_dir, lap_number, channels=POINT_CHANNELS)
+
+def _track_file(track_json_path):
+    """
+    The track file to read: its binary copy (see track_binary.py), which every
+    build writes, or the JSON for tracks built before the binary existed
+    """
+    path = binary_path(track_json_path)
+    return path if os.path.exists(path) else track_json_path
+
+def generate_telemetry_json(csv_path, track_json_path, output_path, track_name, lap_number=2,
+                            follow=False, use_cache=True):
+    """
+    Generate telemetry JSON synced with track
+    
+    Every sample is placed at its map-matched point on the track (see
+    map_matching.py), with its distance along the track and lateral offset.
+    
+    follow: CSV is still growing; only parse rows appended since last run
+    use_cache: skip the build when the CSV, track JSON and parameters are
+    unchanged, and reuse the parsed lap otherwise (see build_cache.py)
+    """
     print(f"Generating telemetry: {track_name}")
     
+    use_cache = use_cache and not follow
+    params = {"lap_number": lap_number}
+    track_path = _track_file(track_json_path)
+    inputs = {"csv": file_fingerprint(csv_path), "track": file_fingerprint(track_path)}
+    output_key = make_key("telemetry-json", TELEMETRY_FORMAT_VERSION, inputs, track_name, params)
+    if use_cache and is_up_to_date(output_path, output_key):
+        print(f"✓ Telemetry up to date: {output_path}")
+        return
+    
     # Load track
-    with open(track_json_path, 'r') as f:
-        track_data = json.load(f)
+    if track_path == track_json_path:
+        with open(track_path, 'r') as f:
+            track_data = json.load(f)
+    else:
+        track_data = read_track_binary(track_path, mmap=False)
     
     # Parse telemetry
-    telemetry = parse_telemetry_data(csv_path)
+    if use_cache:
+        stage_key = make_key("telemetry", TELEMETRY_FORMAT_VERSION, inputs["csv"], lap_number,
+                             POINT_CHANNELS, DEFAULT_TOLERANCE)
+        telemetry = cached_stage("telemetry", stage_key,
+                                 lambda: parse_telemetry_data(csv_path, lap_number))
+    else:
+        telemetry = parse_telemetry_data(csv_path, lap_number, follow=follow)
     
     if not telemetry:
         print("  No telemetry data found")
         return
     
-    # Match telemetry to track points
-    track_points = track_data['points']
-    matched = []
+    # Match every sample to where the car was: its nearest point on the track
+    origin = track_data.get('metadata', {}).get('origin')
+    if origin is None:
+        raise ValueError(f"{track_path} has no metadata.origin; regenerate the track")
+    
+    index = segment_index(track_data['points'], closed=True)
+    match = match_lat_lon(index, [t['lat'] for t in telemetry], [t['lon'] for t in telemetry], origin)
     
-    for i, track_point in enumerate(track_points):
-        if i < len(telemetry):
-            t = telemetry[i]
-            matched.append({
-                'position': track_point,
-                'speed': float(t['speed']),
-                'rpm': float(t['rpm']),
-                'gear': int(t['gear']),
-                'steeringAngle': float(t['steering'])
-            })
+    matched = []
+    for i, t in enumerate(telemetry):
+        matched.append({
+            'position': match['position'][i].tolist(),
+            'distance': float(match['distance'][i]),
+            'lateralOffset': float(match['offset'][i]),
+            'segment': int(match['segment'][i]),
+            'speed': float(t['speed']),
+            'rpm': float(t['rpm']),
+            'gear': int(t['gear']),
+            'steeringAngle': float(t['steering'])
+        })
     
     # Save
     output = {
@@ -89,23 +173,12 @@ def generate_telemetry_json(csv_path, track_json_path, output_path, track_name):
     with open(output_path, 'w') as f:
         json.dump(output, f, indent=2)
     
+    if use_cache:
+        record_build(output_path, output_key, inputs, params)
+    
     print(f"✓ Telemetry generated: {len(matched)} points")
 
 if __name__ == "__main__":
-    tracks = [
-        ("../data/indianapolis/R1_indianapolis_motor_speedway_telemetry.csv",
-         "../frontend/public/tracks/indianapolis.json",
-         "../frontend/public/telemetry/indianapolis.json",
-         "Indianapolis Motor Speedway"),
-        ("../data/barber/R1_barber_telemetry_data.csv",
-         "../frontend/public/tracks/barber.json",
-         "../frontend/public/telemetry/barber.json",
-         "Barber Motorsports Park"),
-    ]
-    
-    for csv_path, track_path, output_path, track_name in tracks:
-        try:
-            generate_telemetry_json(csv_path, track_path, output_path, track_name)
-            print()
-        except Exception as e:
-            print(f"✗ Failed: {e}\n")
+    from build_all import build_stage
+    
+    build_stage("Telemetry", generate_telemetry_json, TELEMETRY_JOBS)
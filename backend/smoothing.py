@@ -0,0 +1,87 @@
+"""
+Loop-aware vectorized smoothing filters for track geometry
+
+All filters take an (N, D) array and smooth along the first axis as NumPy
+convolutions. For a closed circuit (closed=True) the signal is padded by
+wrapping around, so the start/finish area is smoothed exactly like the rest
+of the lap; open polylines are padded with their end values.
+"""
+import numpy as np
+
+def _convolve(points, kernel, closed):
+    """Convolve each column with a symmetric kernel, padding by wrap or edge"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 2:
+        return points.copy()
+
+    radius = len(kernel) // 2
+    padded = np.pad(points, ((radius, radius), (0, 0)), mode='wrap' if closed else 'edge')
+    return np.column_stack([np.convolve(padded[:, d], kernel, mode='valid')
+                            for d in range(points.shape[1])])
+
+def moving_average(points, window=5, closed=True):
+    """
+    Centered moving average via cumulative sums (O(n) regardless of window)
+
+    Open polylines average over the samples available near the ends.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    half = window // 2
+    if n < 2 or half == 0:
+        return points.copy()
+
+    if closed:
+        padded = np.pad(points, ((half, half), (0, 0)), mode='wrap')
+        sums = np.vstack([np.zeros((1, points.shape[1])), np.cumsum(padded, axis=0)])
+        width = 2 * half + 1
+        return (sums[width:] - sums[:-width]) / width
+
+    sums = np.vstack([np.zeros((1, points.shape[1])), np.cumsum(points, axis=0)])
+    idx = np.arange(n)
+    lo = np.maximum(idx - half, 0)
+    hi = np.minimum(idx + half + 1, n)
+    return (sums[hi] - sums[lo]) / (hi - lo)[:, None]
+
+def savgol_kernel(window, polyorder):
+    """Savitzky–Golay smoothing coefficients (least-squares polynomial fit)"""
+    half = window // 2
+    x = np.arange(-half, half + 1, dtype=np.float64)
+    vander = np.vander(x, polyorder + 1, increasing=True)
+    return np.linalg.pinv(vander)[0]
+
+def savitzky_golay(points, window=11, polyorder=2, closed=True):
+    """Savitzky–Golay filter: smooths noise while keeping corner apexes sharp"""
+    if window % 2 == 0:
+        window += 1
+    if polyorder >= window:
+        raise ValueError("polyorder must be less than window")
+    return _convolve(points, savgol_kernel(window, polyorder), closed)
+
+def gaussian_kernel(sigma):
+    """Normalized Gaussian kernel truncated at 3 sigma (sigma in samples)"""
+    radius = max(1, int(np.ceil(3 * sigma)))
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+def gaussian(points, sigma=2.0, closed=True):
+    """Gaussian smoothing (sigma in samples)"""
+    return _convolve(points, gaussian_kernel(sigma), closed)
+
+FILTERS = {
+    'moving_average': lambda points, window, closed: moving_average(points, window, closed),
+    'savgol': lambda points, window, closed: savitzky_golay(points, window, closed=closed),
+    'gaussian': lambda points, window, closed: gaussian(points, window / 4.0, closed),
+}
+
+def smooth(points, method='moving_average', window=5, closed=True):
+    """
+    Smooth with one of FILTERS, sized by window (in samples)
+
+    For 'gaussian', sigma = window / 4 so the kernel spans about the same
+    samples as the other filters.
+    """
+    if method not in FILTERS:
+        raise ValueError(f"Unknown smoothing method: {method}")
+    return FILTERS[method](points, window, closed)
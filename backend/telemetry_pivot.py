@@ -0,0 +1,91 @@
+"""
+Vectorized long-to-wide pivot and resampling of telemetry channels
+"""
+import numpy as np
+import pandas as pd
+
+# The 12 documented telemetry channels
+CHANNELS = [
+    'accx_can', 'accy_can', 'aps', 'pbrake_f', 'pbrake_r', 'gear',
+    'Steering_Angle', 'nmot', 'speed', 'VBOX_Lat_Min', 'VBOX_Long_Minutes',
+    'Laptrigger_lapdist_dls'
+]
+
+# Interpolation per channel when resampling: 'linear', 'hold' (zero-order
+# hold: last known value) or 'nearest'. Unlisted channels are linear.
+DEFAULT_INTERPOLATION = {
+    'gear': 'hold',
+}
+
+def pivot_channels(df, channels=CHANNELS, dtype=np.float32):
+    """
+    Pivot long-format rows into a wide (time x channel) matrix
+
+    Returns (timestamps, matrix): the sorted unique timestamps and a matrix
+    with one column per entry of channels, NaN where a channel has no sample
+    at that timestamp. Use dtype=np.float64 when GPS columns must keep full
+    precision.
+    """
+    df = df[df['telemetry_name'].isin(channels)]
+
+    time_codes, timestamps = pd.factorize(df['timestamp'], sort=True)
+    channel_codes = pd.Categorical(df['telemetry_name'], categories=channels).codes
+
+    matrix = np.full((len(timestamps), len(channels)), np.nan, dtype=dtype)
+    matrix[time_codes, channel_codes] = df['telemetry_value'].to_numpy(dtype=dtype)
+
+    return np.asarray(timestamps), matrix
+
+def timestamps_to_seconds(timestamps):
+    """Timestamps (datetime64, see telemetry_reader) as float seconds since the first one"""
+    ns = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+    if len(ns) == 0:
+        return np.zeros(0)
+    return (ns - ns[0]) / 1e9
+
+def resample_column(t, values, grid, method):
+    """One column sampled at sorted t, interpolated onto grid (NaN samples are skipped)"""
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.full(len(grid), np.nan)
+
+    t_valid = t[valid]
+    v_valid = values[valid]
+
+    if method == 'linear':
+        return np.interp(grid, t_valid, v_valid)
+    if method == 'hold':
+        idx = np.searchsorted(t_valid, grid, side='right') - 1
+        return v_valid[np.clip(idx, 0, len(v_valid) - 1)]
+    if method == 'nearest':
+        if len(v_valid) == 1:
+            return np.full(len(grid), v_valid[0])
+        idx = np.clip(np.searchsorted(t_valid, grid), 1, len(t_valid) - 1)
+        left = idx - 1
+        idx = np.where(grid - t_valid[left] <= t_valid[idx] - grid, left, idx)
+        return v_valid[idx]
+    raise ValueError(f"Unknown interpolation method: {method}")
+
+def resample(timestamps, matrix, channels=CHANNELS, rate_hz=20.0, methods=None):
+    """
+    Resample a pivoted matrix onto a common, uniform time base
+
+    Each channel is interpolated from its own valid samples only, using
+    methods[channel] (falling back to DEFAULT_INTERPOLATION, then linear).
+
+    Returns (time_s, resampled): seconds since the first timestamp and a
+    (len(time_s) x channel) matrix of the input dtype.
+    """
+    methods = {**DEFAULT_INTERPOLATION, **(methods or {})}
+
+    t = timestamps_to_seconds(timestamps)
+    if len(t) == 0:
+        return t, matrix[:0]
+
+    grid = np.arange(0.0, t[-1] + 0.5 / rate_hz, 1.0 / rate_hz)
+    resampled = np.empty((len(grid), len(channels)), dtype=matrix.dtype)
+    for i, name in enumerate(channels):
+        resampled[:, i] = resample_column(t, matrix[:, i].astype(np.float64), grid,
+                                           methods.get(name, 'linear'))
+
+    return grid, resampled
@@ -0,0 +1,140 @@
+"""
+Typed, column-pruned reader for the raw long-format telemetry CSVs
+
+Only the five columns the backend uses are parsed (the meta_* / expire_at
+columns are skipped), with compact dtypes:
+
+    timestamp        datetime64, naive UTC
+    vehicle_id       category
+    lap              int16 (INVALID_LAP for missing or out-of-range counters)
+    telemetry_name   category
+    telemetry_value  float32 (float64 on request, e.g. for GPS)
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    has_pyarrow = True
+except ImportError:
+    has_pyarrow = False
+
+COLUMNS = ['timestamp', 'vehicle_id', 'lap', 'telemetry_name', 'telemetry_value']
+CATEGORY_COLUMNS = ['vehicle_id', 'telemetry_name']
+
+# Lap counters are occasionally garbage (e.g. 32768), which int16 cannot hold
+INVALID_LAP = -1
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def _finish_chunk(chunk, channels):
+    chunk = chunk.dropna(subset=['vehicle_id', 'lap', 'telemetry_name'])
+    if channels is not None:
+        chunk = chunk[chunk['telemetry_name'].isin(channels)]
+
+    lap = chunk['lap'].to_numpy()
+    lap = np.where((lap >= 0) & (lap <= np.iinfo(np.int16).max), lap, INVALID_LAP).astype(np.int16)
+
+    timestamp = pd.to_datetime(chunk['timestamp'], utc=True, format='ISO8601').dt.tz_localize(None)
+
+    return chunk.assign(timestamp=timestamp, lap=lap)[COLUMNS]
+
+def _pandas_chunks(source, chunksize, value_dtype):
+    dtypes = {'vehicle_id': 'category', 'telemetry_name': 'category',
+              'lap': 'float32', 'telemetry_value': value_dtype, 'timestamp': 'str'}
+    return pd.read_csv(source, usecols=COLUMNS, dtype=dtypes, chunksize=chunksize)
+
+def _pyarrow_chunks(source, chunksize, value_dtype):
+    # pyarrow streams fixed-size byte blocks rather than row counts; ~64 bytes per row
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=max(chunksize * 64, 1 << 20)),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=COLUMNS,
+            column_types={'vehicle_id': pa.dictionary(pa.int32(), pa.string()),
+                          'telemetry_name': pa.dictionary(pa.int32(), pa.string()),
+                          'lap': pa.float32(), 'telemetry_value': pa.from_numpy_dtype(np.dtype(value_dtype)),
+                          'timestamp': pa.string()}
+        )
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+def read_telemetry_chunks(source, chunksize=100000, channels=None, value_dtype='float32',
+                          engine=None, stats=None):
+    """
+    Yield typed DataFrame chunks of a raw telemetry CSV (path or file object)
+
+    channels: keep only these telemetry_name values
+    engine: None/'c' for pandas, 'pyarrow' for the multithreaded Arrow parser
+    stats: optional dict, filled with rows, seconds, rows_per_sec and peak_rss_mb
+    """
+    if engine == 'pyarrow':
+        if not has_pyarrow:
+            raise ImportError("pyarrow is required for engine='pyarrow' (pip install pyarrow)")
+        raw_chunks = _pyarrow_chunks(source, chunksize, value_dtype)
+    else:
+        raw_chunks = _pandas_chunks(source, chunksize, value_dtype)
+
+    start = time.time()
+    rows = 0
+    for raw in raw_chunks:
+        rows += len(raw)
+        chunk = _finish_chunk(raw, channels)
+
+        if stats is not None:
+            seconds = time.time() - start
+            stats.update(rows=rows, seconds=seconds,
+                         rows_per_sec=rows / seconds if seconds > 0 else 0.0,
+                         peak_rss_mb=peak_rss_mb())
+
+        if not chunk.empty:
+            yield chunk
+
+def read_telemetry(source, channels=None, value_dtype='float32', engine=None, stats=None):
+    """Read a whole (small) telemetry CSV with the typed schema"""
+    chunks = list(read_telemetry_chunks(source, channels=channels, value_dtype=value_dtype,
+                                        engine=engine, stats=stats))
+    if not chunks:
+        return empty_frame(value_dtype)
+    return concat_chunks(chunks)
+
+def concat_chunks(chunks):
+    """Concatenate chunks, keeping category columns categorical"""
+    df = pd.concat(chunks, ignore_index=True)
+    for name in CATEGORY_COLUMNS:
+        df[name] = df[name].astype('category')
+    return df
+
+def empty_frame(value_dtype='float32'):
+    return pd.DataFrame({
+        'timestamp': pd.Series(dtype='datetime64[ns]'),
+        'vehicle_id': pd.Series(dtype='category'),
+        'lap': pd.Series(dtype='int16'),
+        'telemetry_name': pd.Series(dtype='category'),
+        'telemetry_value': pd.Series(dtype=value_dtype)
+    })
+
+def format_stats(stats):
+    """One-line summary of a stats dict filled by read_telemetry_chunks"""
+    if not stats:
+        return "no rows read"
+    line = f"{stats['rows']:,} rows in {stats['seconds']:.1f}s ({stats['rows_per_sec']:,.0f} rows/s"
+    if stats.get('peak_rss_mb') is not None:
+        line += f", peak RSS {stats['peak_rss_mb']:.0f} MB"
+    return line + ")"
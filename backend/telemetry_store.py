@@ -0,0 +1,211 @@
+"""
+Columnar telemetry store (Parquet, partitioned by track/race/vehicle/lap/channel)
+
+Ingest converts a long-format race CSV once; afterwards a single lap is read
+straight from its partition directory instead of re-scanning the whole CSV.
+
+Layout:
+    <store_root>/<track>/<race>/vehicle_id=<id>/lap=<n>/telemetry_name=<channel>/part-0.parquet
+"""
+import glob
+import json
+import os
+import shutil
+from urllib.parse import quote, unquote
+
+from csv_index import RACE_JOBS, load_index, read_lap_indexed
+from telemetry_tail import read_tail_lap, update_tail
+from telemetry_reader import (INVALID_LAP, concat_chunks, empty_frame, format_stats,
+                              read_telemetry_chunks)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    has_pyarrow = True
+except ImportError:
+    has_pyarrow = False
+
+STORE_ROOT = "../data/store"
+STORE_COLUMNS = ['timestamp', 'vehicle_id', 'lap', 'telemetry_name', 'telemetry_value']
+PARTITION_COLS = ['vehicle_id', 'lap', 'telemetry_name']
+SOURCE_FILE = "_source.json"
+
+def store_path(track, race, store_root=STORE_ROOT):
+    """Directory holding one race of one track"""
+    return os.path.join(store_root, track, race)
+
+def _source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return {
+        "csv_path": os.path.realpath(csv_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime
+    }
+
+def _store_schema():
+    return pa.schema([
+        ('timestamp', pa.timestamp('us')),
+        ('vehicle_id', pa.string()),
+        ('lap', pa.int32()),
+        ('telemetry_name', pa.string()),
+        ('telemetry_value', pa.float64())
+    ])
+
+def _record_batches(csv_path, schema, chunksize, stats):
+    for chunk in read_telemetry_chunks(csv_path, chunksize=chunksize, value_dtype='float64', stats=stats):
+        chunk = chunk[chunk['lap'] != INVALID_LAP]
+        chunk = chunk.astype({'vehicle_id': str, 'telemetry_name': str})
+        yield pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+
+def ingest_csv(csv_path, track, race, store_root=STORE_ROOT, chunksize=100000):
+    """
+    Convert a long-format telemetry CSV into the partitioned Parquet store
+
+    The CSV is streamed once. Rows are time-ordered, so only the partitions of
+    the laps currently running are open at any time.
+    """
+    if not has_pyarrow:
+        raise ImportError("pyarrow is required to build the telemetry store (pip install pyarrow)")
+
+    out_dir = store_path(track, race, store_root)
+    print(f"Ingesting {csv_path} -> {out_dir}")
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    schema = _store_schema()
+    stats = {}
+    ds.write_dataset(
+        _record_batches(csv_path, schema, chunksize, stats),
+        out_dir,
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([(name, schema.field(name).type) for name in PARTITION_COLS]),
+            flavor="hive"
+        ),
+        basename_template="part-{i}.parquet",
+        max_open_files=512,
+        existing_data_behavior="overwrite_or_ignore"
+    )
+
+    # Written last: a store without its source record is treated as incomplete
+    with open(os.path.join(out_dir, SOURCE_FILE), 'w') as f:
+        json.dump(_source_fingerprint(csv_path), f, indent=2)
+
+    print(f"  Read {format_stats(stats)}")
+    print(f"✓ Store written: {out_dir}")
+    return out_dir
+
+def find_store(csv_path, store_root=STORE_ROOT):
+    """Return the up-to-date store directory built from csv_path, or None"""
+    if not has_pyarrow or not os.path.exists(csv_path):
+        return None
+
+    current = _source_fingerprint(csv_path)
+    for source_file in glob.glob(os.path.join(store_root, '*', '*', SOURCE_FILE)):
+        with open(source_file, 'r') as f:
+            source = json.load(f)
+        if source == current:
+            return os.path.dirname(source_file)
+    return None
+
+def _partition_dir(name, value):
+    return f"{name}={quote(str(value), safe='')}"
+
+def _partition_value(path):
+    return unquote(os.path.basename(path).split('=', 1)[1])
+
+def read_lap(store_dir, lap_number, vehicle_id=None, channels=None, value_dtype='float32'):
+    """
+    Read one lap from a store directory as a long-format DataFrame
+
+    Only the matching partition directories are opened, so the cost depends on
+    the size of the lap, not of the race.
+    """
+    if vehicle_id is None:
+        vehicle_dirs = sorted(glob.glob(os.path.join(store_dir, 'vehicle_id=*')))
+    else:
+        vehicle_dirs = [os.path.join(store_dir, _partition_dir('vehicle_id', vehicle_id))]
+
+    frames = []
+    for vehicle_dir in vehicle_dirs:
+        lap_dir = os.path.join(vehicle_dir, _partition_dir('lap', lap_number))
+        if channels is None:
+            channel_dirs = sorted(glob.glob(os.path.join(lap_dir, 'telemetry_name=*')))
+        else:
+            channel_dirs = [os.path.join(lap_dir, _partition_dir('telemetry_name', c)) for c in channels]
+
+        for channel_dir in channel_dirs:
+            files = sorted(glob.glob(os.path.join(channel_dir, '*.parquet')))
+            if not files:
+                continue
+            frame = pa.concat_tables([pq.read_table(path) for path in files]).to_pandas()
+            frame['vehicle_id'] = _partition_value(vehicle_dir)
+            frame['lap'] = lap_number
+            frame['telemetry_name'] = _partition_value(channel_dir)
+            frames.append(frame)
+
+    if not frames:
+        return empty_frame(value_dtype)
+
+    df = concat_chunks(frames)[STORE_COLUMNS]
+    df['lap'] = df['lap'].astype('int16')
+    df['telemetry_value'] = df['telemetry_value'].astype(value_dtype)
+    return df.sort_values('timestamp', kind='stable', ignore_index=True)
+
+def scan_lap(csv_path, lap_number, vehicle_id=None, channels=None, chunksize=100000,
+             value_dtype='float32'):
+    """Full chunked scan of the raw CSV (used when no store has been built)"""
+    chunks = []
+    stats = {}
+    for chunk in read_telemetry_chunks(csv_path, chunksize=chunksize, channels=channels,
+                                       value_dtype=value_dtype, stats=stats):
+        mask = chunk['lap'] == lap_number
+        if vehicle_id is not None:
+            mask &= chunk['vehicle_id'] == vehicle_id
+        lap_chunk = chunk[mask]
+        if not lap_chunk.empty:
+            chunks.append(lap_chunk)
+
+    print(f"  Scanned {format_stats(stats)}")
+    if not chunks:
+        return empty_frame(value_dtype)
+    return concat_chunks(chunks)
+
+def load_lap(csv_path, lap_number, vehicle_id=None, channels=None, value_dtype='float32',
+             store_root=STORE_ROOT, follow=False):
+    """
+    Read one lap by the fastest available route: the columnar store, then the
+    CSV's byte-offset index, then a full scan of the CSV
+
+    With follow=True the CSV is treated as growing: only newly appended rows
+    are parsed into the tail cache (see telemetry_tail.py), which is read instead.
+    """
+    if follow:
+        update_tail(csv_path)
+        return read_tail_lap(csv_path, lap_number, vehicle_id=vehicle_id, channels=channels,
+                             value_dtype=value_dtype)
+
+    store_dir = find_store(csv_path, store_root)
+    if store_dir is not None:
+        return read_lap(store_dir, lap_number, vehicle_id=vehicle_id, channels=channels,
+                        value_dtype=value_dtype)
+
+    index = load_index(csv_path)
+    if index is not None:
+        return read_lap_indexed(csv_path, index, lap_number, vehicle_id=vehicle_id,
+                                channels=channels, value_dtype=value_dtype)
+
+    return scan_lap(csv_path, lap_number, vehicle_id=vehicle_id, channels=channels,
+                    value_dtype=value_dtype)
+
+if __name__ == "__main__":
+    for csv_path, track, race in RACE_JOBS:
+        try:
+            ingest_csv(csv_path, track, race)
+            print()
+        except Exception as e:
+            print(f"✗ Failed to ingest {track} {race}: {e}\n")
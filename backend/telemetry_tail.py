@@ -0,0 +1,191 @@
+"""
+Incremental (tail/follow) ingestion of telemetry CSVs that grow during a session
+
+The CSV dumps are fed from Kafka (meta_source = kafka:gr-raw) and keep growing
+while a session runs. update_tail() parses only the bytes appended since the
+last call and appends the new samples to per-(vehicle, lap) cache files, so
+consumers can re-read a lap without re-reading the whole CSV.
+
+Layout:
+    <csv>.tail/state.json                     byte offset, header, checksums of the parsed bytes
+    <csv>.tail/<vehicle_id>/lap=<n>.bin       appended rows (timestamp ns, channel, value)
+
+Usage:
+    python telemetry_tail.py <csv> <track_json> <track_name> [--interval S] [--lap N]
+"""
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from telemetry_pivot import CHANNELS
+from telemetry_reader import INVALID_LAP, empty_frame, read_telemetry
+
+ROW_DTYPE = np.dtype([('timestamp', '<i8'), ('channel', '<i1'), ('value', '<f8')])
+STATE_FILE = "state.json"
+BLOCK_BYTES = 64 << 20  # parse appended data 64 MB at a time
+CHECK_BYTES = 64 << 10  # hashed at the head and just before the offset to spot a rewritten CSV
+
+EMPTY_STATE = {"offset": 0, "header": None, "checksums": None}
+
+def tail_dir(csv_path):
+    """Cache directory next to the CSV"""
+    return csv_path + '.tail'
+
+def _read_state(csv_path):
+    path = os.path.join(tail_dir(csv_path), STATE_FILE)
+    if not os.path.exists(path):
+        return dict(EMPTY_STATE)
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _write_state(csv_path, state):
+    path = os.path.join(tail_dir(csv_path), STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def _checksums(f, offset):
+    """Hashes of the first bytes of an open CSV and of the bytes just before offset"""
+    def digest(start, stop):
+        f.seek(start)
+        return hashlib.sha1(f.read(stop - start)).hexdigest()
+    return [digest(0, min(offset, CHECK_BYTES)), digest(max(offset - CHECK_BYTES, 0), offset)]
+
+def _lap_file(csv_path, vehicle_id, lap):
+    return os.path.join(tail_dir(csv_path), quote(str(vehicle_id), safe=''), f"lap={lap}.bin")
+
+def _append_rows(csv_path, df, touched):
+    channel_codes = pd.Categorical(df['telemetry_name'], categories=CHANNELS).codes
+    df = df.assign(channel=channel_codes)[channel_codes >= 0]
+
+    for (vehicle_id, lap), group in df.groupby(['vehicle_id', 'lap'], sort=False, observed=True):
+        rows = np.empty(len(group), dtype=ROW_DTYPE)
+        rows['timestamp'] = group['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        rows['channel'] = group['channel'].to_numpy()
+        rows['value'] = group['telemetry_value'].to_numpy()
+
+        path = _lap_file(csv_path, vehicle_id, int(lap))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as f:
+            rows.tofile(f)
+        touched.add((vehicle_id, int(lap)))
+
+def update_tail(csv_path):
+    """
+    Parse the rows appended since the last call and add them to the lap cache
+
+    Only complete lines are consumed; a partially written last line is picked
+    up next time. If the CSV was rotated or rewritten (it shrank, or its head
+    or the bytes before the offset changed), the cache is dropped and rebuilt
+    from the whole file, as if tailing it for the first time.
+
+    Returns the set of (vehicle_id, lap) keys that received new rows.
+    """
+    state = _read_state(csv_path)
+    size = os.path.getsize(csv_path)
+
+    touched = set()
+    with open(csv_path, 'rb') as f:
+        if state["offset"] and (size < state["offset"] or
+                                _checksums(f, state["offset"]) != state["checksums"]):
+            print(f"  {csv_path} was rewritten, rebuilding tail cache")
+            shutil.rmtree(tail_dir(csv_path))
+            state = dict(EMPTY_STATE)
+        os.makedirs(tail_dir(csv_path), exist_ok=True)
+
+        if state["offset"] == 0:
+            f.seek(0)
+            header = f.readline()
+            if not header.endswith(b'\n'):
+                return touched
+            state["header"] = header.decode('utf-8')
+            state["offset"] = len(header)
+        header = state["header"].encode('utf-8')
+
+        f.seek(state["offset"])
+        while True:
+            block = f.read(BLOCK_BYTES)
+            end = block.rfind(b'\n') + 1
+            if end == 0:
+                break
+
+            df = read_telemetry(io.BytesIO(header + block[:end]), value_dtype='float64')
+            df = df[df['lap'] != INVALID_LAP]
+            if not df.empty:
+                _append_rows(csv_path, df, touched)
+
+            state["offset"] += end
+            f.seek(state["offset"])
+
+        state["checksums"] = _checksums(f, state["offset"])
+    _write_state(csv_path, state)
+    return touched
+
+def read_tail_lap(csv_path, lap_number, vehicle_id=None, channels=None, value_dtype='float32'):
+    """Read one lap from the tail cache as a long-format DataFrame"""
+    if vehicle_id is None:
+        paths = sorted(glob.glob(os.path.join(tail_dir(csv_path), '*', f"lap={lap_number}.bin")))
+    else:
+        paths = [_lap_file(csv_path, vehicle_id, lap_number)]
+
+    frames = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        rows = np.fromfile(path, dtype=ROW_DTYPE)
+        frames.append(pd.DataFrame({
+            'timestamp': rows['timestamp'].astype('datetime64[ns]'),
+            'vehicle_id': unquote(os.path.basename(os.path.dirname(path))),
+            'lap': np.int16(lap_number),
+            'telemetry_name': pd.Categorical.from_codes(rows['channel'], categories=CHANNELS),
+            'telemetry_value': rows['value'].astype(value_dtype)
+        }))
+
+    if not frames:
+        return empty_frame(value_dtype)
+
+    df = pd.concat(frames, ignore_index=True)
+    if channels is not None:
+        df = df[df['telemetry_name'].isin(channels)]
+    df['vehicle_id'] = df['vehicle_id'].astype('category')
+    df['telemetry_name'] = df['telemetry_name'].astype('category')
+    return df.sort_values('timestamp', kind='stable', ignore_index=True)
+
+def follow(csv_path, track_json_path, track_name, lap_number=2, interval=5.0):
+    """
+    Poll a growing CSV and rebuild the track JSON whenever lap_number receives
+    new rows. Each refresh only parses what was appended.
+    """
+    from generate_track import generate_track_json
+
+    print(f"Following {csv_path} (Ctrl+C to stop)")
+    try:
+        while True:
+            touched = update_tail(csv_path)
+            if any(lap == lap_number for _, lap in touched):
+                generate_track_json(csv_path, track_json_path, track_name,
+                                    lap_number=lap_number, follow=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("✓ Stopped following")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Follow a growing telemetry CSV")
+    parser.add_argument("csv_path")
+    parser.add_argument("track_json_path")
+    parser.add_argument("track_name")
+    parser.add_argument("--lap", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    follow(args.csv_path, args.track_json_path, args.track_name, args.lap, args.interval)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from lap_distance import LAPDIST_CHANNEL, lap_rows, to_distance_domain
+
+CHANNELS = [LAPDIST_CHANNEL, 'speed']
+
+def _lap(lapdist, hz=10):
+    lapdist = np.asarray(lapdist, dtype=np.float64)
+    offsets = (np.arange(len(lapdist)) * 1e9 / hz).astype('timedelta64[ns]')
+    timestamps = np.datetime64('2025-01-01T12:00:00', 'ns') + offsets
+    speed = np.full(len(lapdist), 40.0)
+    return timestamps, np.column_stack([lapdist, speed])
+
+def test_stale_sample_before_the_reset_is_dropped():
+    # One sample left over from the previous lap, then the lap from 0 to 4000 m
+    timestamps, matrix = _lap(np.concatenate([[3995.0], np.linspace(0.0, 4000.0, 4001)]))
+
+    distance, elapsed, resampled = to_distance_domain(timestamps, matrix, CHANNELS)
+
+    assert len(distance) == 4001
+    assert distance[0] == 0.0 and distance[-1] == 4000.0
+    # Timed from the lap's first sample, not the stale one
+    assert elapsed[0] == 0.0
+    np.testing.assert_allclose(elapsed[-1], 400.0)
+    np.testing.assert_allclose(resampled[:, 1], 40.0)
+
+def test_next_lap_samples_after_the_reset_are_dropped():
+    lapdist = np.concatenate([np.linspace(0.0, 4000.0, 401), [2.0, 12.0]])
+    assert lap_rows(lapdist) == (0, 401)
+
+def test_sparse_lapdist_keeps_rows_between_samples():
+    lapdist = np.full(10, np.nan)
+    lapdist[[2, 5, 8]] = [3990.0, 10.0, 60.0]
+    assert lap_rows(lapdist) == (5, 10)
+
+def test_noise_is_not_a_reset():
+    lapdist = np.array([0.0, 10.0, 9.5, 20.0, 30.0])
+    assert lap_rows(lapdist) == (0, 5)
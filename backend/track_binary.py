@@ -0,0 +1,109 @@
+"""
+Compact binary track container
+
+Layout (little-endian):
+    magic       4 bytes   b'TRKB'
+    version     uint32
+    header_len  uint32    length of the JSON header in bytes
+    header      JSON      name, count, metadata, segments and, for every
+                          array, its byte offset and components per point;
+                          space-padded to a multiple of 4 bytes
+    arrays      float32   one contiguous block per array, 4-byte aligned
+
+Every array is readable without parsing text, e.g. in Python
+
+    np.memmap(path, dtype='<f4', mode='r', offset=offset, shape=(count, components))
+
+or in JavaScript as new Float32Array(buffer, offset, count * components).
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'TRKB'
+VERSION = 1
+PREAMBLE = struct.Struct('<4sII')
+
+# Per-point arrays stored as float32 (name in the track JSON -> components)
+TRACK_ARRAYS = {
+    "points": 3,
+    "distances": 1,
+    "headings": 1,
+    "curvature": 1,
+    "widths": 1,
+}
+
+def binary_path(json_path):
+    """Where the binary container of a track JSON goes (same name, .bin)"""
+    return os.path.splitext(json_path)[0] + '.bin'
+
+def write_track_binary(path, track_data):
+    """Write the per-point arrays of a track dict as float32 plus a JSON header of everything else"""
+    count = len(track_data["points"])
+    arrays = {name: np.ascontiguousarray(track_data[name], dtype='<f4').reshape(count, components)
+              for name, components in TRACK_ARRAYS.items() if track_data.get(name) is not None}
+
+    header = {key: value for key, value in track_data.items() if key not in arrays}
+    header["count"] = count
+    header["arrays"] = {}
+
+    # Offsets depend on the header length, so size the header with placeholders first
+    def encode():
+        raw = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        return raw + b' ' * (-(PREAMBLE.size + len(raw)) % 4)
+
+    for name, array in arrays.items():
+        header["arrays"][name] = {"offset": 0, "components": array.shape[1]}
+    while True:
+        raw = encode()
+        offset = PREAMBLE.size + len(raw)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = {"offset": offset, "components": array.shape[1]}
+            offset += array.nbytes
+        if layout == header["arrays"]:
+            break
+        header["arrays"] = layout
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(raw)))
+        f.write(raw)
+        for array in arrays.values():
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+def read_track_header(path):
+    """The JSON header of a binary track (everything but the arrays, plus their layout)"""
+    with open(path, 'rb') as f:
+        magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary track file")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported binary track version {version}")
+        return json.loads(f.read(header_len))
+
+def read_track_binary(path, mmap=True):
+    """
+    Read a binary track: the header dict with every array added under its name
+
+    Arrays are (count, components) float32, memory-mapped unless mmap=False;
+    single-component arrays are returned flat.
+    """
+    header = read_track_header(path)
+    count = header["count"]
+    track = {key: value for key, value in header.items() if key != "arrays"}
+
+    for name, entry in header["arrays"].items():
+        shape = (count, entry["components"])
+        if mmap and count:
+            array = np.memmap(path, dtype='<f4', mode='r', offset=entry["offset"], shape=shape)
+        else:
+            with open(path, 'rb') as f:
+                f.seek(entry["offset"])
+                array = np.fromfile(f, dtype='<f4', count=count * entry["components"]).reshape(shape)
+        track[name] = array[:, 0] if entry["components"] == 1 else array
+
+    return track
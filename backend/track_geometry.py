@@ -0,0 +1,250 @@
+"""
+Vectorized geometry helpers for track centerlines
+"""
+import numpy as np
+
+def _dedupe(points):
+    """Drop consecutive duplicate points (zero-length segments)"""
+    if len(points) < 2:
+        return points
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+    return points[keep]
+
+def cumulative_distance(points, closed=False):
+    """
+    Distance along the polyline at every point, starting at 0
+
+    With closed=True one more entry is appended: the full loop length,
+    i.e. the distance back to the first point.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if closed and len(points):
+        points = np.vstack([points, points[:1]])
+    seg = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    return np.concatenate([[0.0], np.cumsum(seg)])
+
+def resample_arc_length(points, count, closed=True):
+    """
+    Resample a polyline to exactly count points evenly spaced along its length
+
+    Args:
+        points: (N, D) array-like
+        count: number of output points
+        closed: treat the polyline as a loop (the last point connects back to
+                the first); the output then does not repeat the first point
+
+    Returns:
+        (resampled, distances): (count, D) points and their distance along the
+        track from the first input point. Spacing is distances[1] everywhere.
+    """
+    points = _dedupe(np.asarray(points, dtype=np.float64))
+    if len(points) < 2 or count < 2:
+        return points[:count].copy(), np.zeros(min(len(points), count))
+
+    distance = cumulative_distance(points, closed=closed)
+    total = distance[-1]
+    if closed:
+        points = np.vstack([points, points[:1]])
+        stations = np.arange(count) * (total / count)
+    else:
+        stations = np.linspace(0.0, total, count)
+
+    resampled = np.column_stack([np.interp(stations, distance, points[:, d])
+                                 for d in range(points.shape[1])])
+    return resampled, stations
+
+def _segment_distance(points, starts, ends):
+    """Distance of each point to the segment from its start to its end (row-wise)"""
+    vectors = ends - starts
+    length_sq = np.einsum('nd,nd->n', vectors, vectors)
+    t = np.einsum('nd,nd->n', points - starts, vectors) / np.where(length_sq > 0, length_sq, 1.0)
+    nearest = starts + np.clip(t, 0.0, 1.0)[:, None] * vectors
+    return np.linalg.norm(points - nearest, axis=1)
+
+def simplify_significance(points, tolerance=0.0, closed=False):
+    """
+    Ramer-Douglas-Peucker significance of every point
+
+    Iterative and vectorized: each pass splits every open range at its
+    farthest point at once (one O(n) pass per level of the split tree).
+    A point's significance is its deviation when inserted, capped by the
+    significance of the two points that bound its range, so
+    `significance > tolerance` selects exactly the RDP result for any
+    tolerance at or above the one given here, and ranking by significance
+    gives nested levels of detail.
+
+    Endpoints (and for a closed loop, the first point) are infinitely
+    significant; points never inserted are 0.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    significance = np.zeros(n)
+    if n == 0:
+        return significance
+
+    # A closed loop is simplified as an open line that ends where it starts
+    work = np.vstack([points, points[:1]]) if closed else points
+    last = len(work) - 1
+    effective = np.zeros(len(work))
+    effective[[0, last]] = np.inf
+    kept = np.array([0, last])
+
+    while True:
+        # Range of every point: between the kept points around it
+        owner = np.searchsorted(kept, np.arange(len(work)), side='right') - 1
+        owner = np.minimum(owner, len(kept) - 2)
+        start, end = kept[owner], kept[owner + 1]
+        deviation = _segment_distance(work, work[start], work[end])
+        deviation[kept] = 0.0
+
+        range_max = np.maximum.reduceat(deviation, kept[:-1])
+        split = range_max > tolerance
+        if not split.any():
+            break
+
+        # First point reaching its range's maximum, for every range to split
+        candidates = np.flatnonzero(split[owner] & (deviation == range_max[owner]) & (deviation > 0))
+        ranges, first = np.unique(owner[candidates], return_index=True)
+        new = candidates[first]
+        effective[new] = np.minimum(deviation[new],
+                                    np.minimum(effective[kept[ranges]], effective[kept[ranges + 1]]))
+        kept = np.sort(np.concatenate([kept, new]))
+
+    significance[:] = effective[:n]
+    return significance
+
+def simplify(points, tolerance, closed=False):
+    """
+    Indices of the points kept by Ramer-Douglas-Peucker simplification
+
+    Every dropped point lies within tolerance (same units as points) of the
+    simplified polyline.
+    """
+    return np.flatnonzero(simplify_significance(points, tolerance, closed) > tolerance)
+
+def _neighbours(points, closed):
+    """Previous and next point of every point; open ends repeat themselves"""
+    if closed:
+        return np.roll(points, 1, axis=0), np.roll(points, -1, axis=0)
+    previous = np.vstack([points[:1], points[:-1]])
+    following = np.vstack([points[1:], points[-1:]])
+    return previous, following
+
+def headings(points, closed=True):
+    """Direction of travel at every point in radians, atan2(dz, dx) of the central difference"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 2:
+        return np.zeros(len(points))
+    previous, following = _neighbours(points, closed)
+    forward = following - previous
+    return np.arctan2(forward[:, 2], forward[:, 0])
+
+def curvature(points, closed=True):
+    """
+    Signed curvature (1/m) at every point, from the circle through it and its
+    neighbours; positive turning left (from +x towards +z), 0 at open ends
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return np.zeros(len(points))
+    previous, following = _neighbours(points, closed)
+    ab = points - previous
+    bc = following - points
+    cross = ab[:, 0] * bc[:, 2] - ab[:, 2] * bc[:, 0]
+    denominator = (np.linalg.norm(ab, axis=1) * np.linalg.norm(bc, axis=1)
+                   * np.linalg.norm(following - previous, axis=1))
+    return np.divide(2.0 * cross, denominator, out=np.zeros(len(points)), where=denominator > 0)
+
+def _runs(mask):
+    """(start, end) index pairs of the runs of True in a 1-D mask, end inclusive"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+def segment_corners(distances, kappa, length=None, threshold=1 / 250, min_length=10.0):
+    """
+    Split a track into corners and straights
+
+    A corner is a run of points turning the same way with |curvature| above
+    threshold (radius below 1/threshold metres) that spans at least
+    min_length metres; its apex is the point of highest |curvature|.
+
+    Args:
+        distances: distance along the track at every point
+        kappa: signed curvature at every point (see curvature())
+        length: loop length of a closed track, where a corner may run
+                through the first point (start/finish); None when open
+
+    Returns:
+        list of dicts in track order, covering every point once:
+        {"type": "corner", "start", "apex", "end", "direction": "left"|"right"}
+        or {"type": "straight", "start", "end"} (indices into the points;
+        on a closed track the last segment may wrap, so end < start)
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    kappa = np.asarray(kappa, dtype=np.float64)
+    n = len(kappa)
+    if n == 0:
+        return []
+
+    # Rotate a closed track so it starts on a straight and no corner wraps
+    closed = length is not None
+    shift = 0
+    if closed:
+        straight = np.flatnonzero(np.abs(kappa) <= threshold)
+        shift = int(straight[0]) if len(straight) else 0
+    order = (np.arange(n) + shift) % n
+    k = kappa[order]
+    along = distances[order]
+    if closed and shift:
+        along = np.where(order < shift, along + length, along)
+
+    starts, ends, directions = [], [], []
+    for sign, direction in ((1, "left"), (-1, "right")):
+        run_start, run_end = _runs(sign * k > threshold)
+        long_enough = along[run_end] - along[run_start] >= min_length
+        starts.append(run_start[long_enough])
+        ends.append(run_end[long_enough])
+        directions += [direction] * int(long_enough.sum())
+    starts = np.concatenate(starts)
+    ends = np.concatenate(ends)
+    by_start = np.argsort(starts, kind='stable')
+    starts, ends = starts[by_start], ends[by_start]
+    directions = [directions[i] for i in by_start]
+
+    # Apex: first point of the highest |curvature| in each corner
+    magnitude = np.abs(k)
+    apexes = [int(start + np.argmax(magnitude[start:end + 1])) for start, end in zip(starts, ends)]
+
+    segments = []
+    cursor = 0
+    for start, apex, end, direction in zip(starts, apexes, ends, directions):
+        if start > cursor:
+            segments.append({"type": "straight", "start": cursor, "end": int(start) - 1})
+        segments.append({"type": "corner", "start": int(start), "apex": apex, "end": int(end),
+                         "direction": direction})
+        cursor = int(end) + 1
+    if cursor < n:
+        segments.append({"type": "straight", "start": cursor, "end": n - 1})
+
+    # Back to the caller's indices
+    for segment in segments:
+        for field in ("start", "apex", "end"):
+            if field in segment:
+                segment[field] = int(order[segment[field]])
+    return segments
+
+def lod_indices(significance, count):
+    """
+    Level of detail: indices (in track order) of the count most significant
+    points (see simplify_significance), plus its maximum deviation from the
+    full line, i.e. the significance of the most significant point left out
+
+    Levels taken from one ranking are nested: every point of a coarser level
+    is also in every finer one. count=None keeps every point.
+    """
+    significance = np.asarray(significance)
+    if count is None or count >= len(significance):
+        return np.arange(len(significance)), 0.0
+    order = np.argsort(-significance, kind='stable')
+    return np.sort(order[:count]), float(significance[order[count]])
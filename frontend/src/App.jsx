@@ -3,6 +3,7 @@ import { Canvas } from '@react-three/fiber'
 import { OrbitControls, Grid } from '@react-three/drei'
 import Track from './components/Track'
 import Minimap from './components/Minimap'
+import { loadTrack } from './utils/trackBinary'
 
 function Scene({ trackData, modelPath }) {
   return (
@@ -33,13 +34,13 @@ function Scene({ trackData, modelPath }) {
 }
 
 const TRACKS = [
-  { id: 'indianapolis', name: 'Indianapolis', real: true, length: '4.014 km', turns: 14, model: '/models/Indy.gltf' },
-  { id: 'barber', name: 'Barber', real: true, length: '3.740 km', turns: 17, model: '/models/Barber.gltf' },
-  { id: 'cota', name: 'COTA', real: false, length: '5.513 km', turns: 20, model: '/models/COTA.gltf' },
-  { id: 'road-america', name: 'Road America', real: false, length: '6.515 km', turns: 14, model: '/models/Road-America.gltf' },
-  { id: 'sebring', name: 'Sebring', real: false, length: '6.019 km', turns: 17, model: '/models/Sebring.gltf' },
-  { id: 'vir', name: 'VIR', real: false, length: '5.263 km', turns: 18, model: '/models/VIR.gltf' },
-  { id: 'sonoma', name: 'Sonoma', real: false, length: '4.052 km', turns: 12, model: '/models/Sonoma.gltf' },
+  { id: 'indianapolis', name: 'Indianapolis', real: true, length: '4.014 km', turns: 14, model: '/models/Indy.glb' },
+  { id: 'barber', name: 'Barber', real: true, length: '3.740 km', turns: 17, model: '/models/Barber.glb' },
+  { id: 'cota', name: 'COTA', real: false, length: '5.513 km', turns: 20, model: '/models/COTA.glb' },
+  { id: 'road-america', name: 'Road America', real: false, length: '6.515 km', turns: 14, model: '/models/Road-America.glb' },
+  { id: 'sebring', name: 'Sebring', real: false, length: '6.019 km', turns: 17, model: '/models/Sebring.glb' },
+  { id: 'vir', name: 'VIR', real: false, length: '5.263 km', turns: 18, model: '/models/VIR.glb' },
+  { id: 'sonoma', name: 'Sonoma', real: false, length: '4.052 km', turns: 12, model: '/models/Sonoma.glb' },
 ]
 
 function App() {
@@ -66,8 +67,7 @@ function App() {
   
   useEffect(() => {
     setLoading(true)
-    fetch(`/tracks/${selectedTrack}.json`)
-      .then(res => res.json())
+    loadTrack(selectedTrack)
       .then(track => {
         setTrackData(track)
         setLoading(false)
@@ -100,7 +100,7 @@ function App() {
       </Canvas>
       
       {/* Minimap */}
-      <Minimap modelPath={TRACKS.find(t => t.id === selectedTrack)?.model} />
+      <Minimap trackId={selectedTrack} modelPath={TRACKS.find(t => t.id === selectedTrack)?.model} />
       
       {/* Track Selector */}
       <div style={{
@@ -1,7 +1,13 @@
-import { useEffect, useRef } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import { useGLTF } from '@react-three/drei'
 import { Canvas } from '@react-three/fiber'
 import { OrthographicCamera } from '@react-three/drei'
+import * as THREE from 'three'
+import { loadTrackLod } from '../utils/trackBinary'
+
+// The minimap is 200 px across; a 100-point tier is plenty at that size
+const MINIMAP_SIZE = 200
+const MINIMAP_LOD = 100
 
 function TrackView({ modelPath }) {
   if (!modelPath) return null
@@ -16,7 +22,52 @@ function TrackView({ modelPath }) {
   )
 }
 
-export default function Minimap({ modelPath }) {
+function TrackOutline({ track }) {
+  const { geometry, center, zoom } = useMemo(() => {
+    const positions = new Float32Array(track.points.length * 3)
+    track.points.forEach((p, i) => positions.set([p[0], p[1], p[2]], i * 3))
+    
+    const geometry = new THREE.BufferGeometry()
+    geometry.setAttribute('position', new THREE.BufferAttribute(positions, 3))
+    geometry.computeBoundingBox()
+    
+    // Fit the outline into the view, with a margin
+    const box = geometry.boundingBox
+    const extent = Math.max(box.max.x - box.min.x, box.max.z - box.min.z, 1)
+    const center = [(box.min.x + box.max.x) / 2, (box.min.z + box.max.z) / 2]
+    return { geometry, center, zoom: (MINIMAP_SIZE * 0.9) / extent }
+  }, [track])
+  
+  return (
+    <>
+      <OrthographicCamera
+        makeDefault
+        position={[center[0], 500, center[1]]}
+        rotation={[-Math.PI / 2, 0, 0]}
+        zoom={zoom}
+      />
+      <line geometry={geometry}>
+        <lineBasicMaterial color="#fff" />
+      </line>
+    </>
+  )
+}
+
+export default function Minimap({ trackId, modelPath }) {
+  // Low level-of-detail tier of the track; the 3D model when the track has none
+  const [lod, setLod] = useState(null)
+  
+  useEffect(() => {
+    let cancelled = false
+    setLod(null)
+    if (trackId) {
+      loadTrackLod(trackId, MINIMAP_LOD)
+        .then(track => { if (!cancelled) setLod(track) })
+        .catch(() => {})
+    }
+    return () => { cancelled = true }
+  }, [trackId])
+  
   return (
     <div style={{
       position: 'absolute',
@@ -37,12 +88,16 @@ export default function Minimap({ modelPath }) {
         MINIMAP
       </div>
       <div style={{
-        width: '200px',
-        height: '200px',
+        width: `${MINIMAP_SIZE}px`,
+        height: `${MINIMAP_SIZE}px`,
         border: '1px solid #333',
         background: '#000'
       }}>
-        {modelPath && (
+        {lod ? (
+          <Canvas>
+            <TrackOutline track={lod} />
+          </Canvas>
+        ) : modelPath && (
           <Canvas>
             <OrthographicCamera makeDefault position={[0, 500, 0]} zoom={1} />
             <TrackView modelPath={modelPath} />
@@ -31,10 +31,16 @@ export function useTelemetry(data, isPlaying = true, offset = 0) {
         if (speed > 160) gear = 5
         if (speed > 200) gear = 6
         
-        const prevPoint = data.points[(i - 1 + data.points.length) % data.points.length]
-        const angle1 = Math.atan2(point[2] - prevPoint[2], point[0] - prevPoint[0])
-        const angle2 = Math.atan2(nextPoint[2] - point[2], nextPoint[0] - point[0])
-        const steeringAngle = (angle2 - angle1) * 100
+        // Heading change to the next point: precomputed curvature when the track has it
+        let steeringAngle
+        if (data.curvature) {
+          steeringAngle = data.curvature[i] * distance * 100
+        } else {
+          const prevPoint = data.points[(i - 1 + data.points.length) % data.points.length]
+          const angle1 = Math.atan2(point[2] - prevPoint[2], point[0] - prevPoint[0])
+          const angle2 = Math.atan2(nextPoint[2] - point[2], nextPoint[0] - point[0])
+          steeringAngle = (angle2 - angle1) * 100
+        }
         
         return {
           position: point,
@@ -0,0 +1,48 @@
+// Reader for the binary track container written by backend/track_binary.py:
+// 'TRKB' magic, uint32 version, uint32 header length, JSON header, then
+// 4-byte aligned float32 arrays described by header.arrays.
+
+const MAGIC = 'TRKB'
+const PREAMBLE_SIZE = 12
+
+export function parseTrackBinary(buffer) {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  if (magic !== MAGIC) throw new Error('Not a binary track file')
+
+  const headerLength = view.getUint32(8, true)
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, PREAMBLE_SIZE, headerLength)))
+  const { arrays, count, ...track } = header
+
+  for (const [name, { offset, components }] of Object.entries(arrays)) {
+    const values = new Float32Array(buffer, offset, count * components)
+    // Multi-component arrays (points) become per-point views, like the JSON arrays
+    track[name] = components === 1
+      ? values
+      : Array.from({ length: count }, (_, i) => values.subarray(i * components, (i + 1) * components))
+  }
+
+  return track
+}
+
+export function loadTrack(trackId) {
+  // The binary file is much smaller and faster to parse; JSON is the fallback
+  return fetch(`/tracks/${trackId}.bin`)
+    .then(res => {
+      if (!res.ok) throw new Error(`No binary track for ${trackId}`)
+      return res.arrayBuffer()
+    })
+    .then(parseTrackBinary)
+    .catch(() => fetch(`/tracks/${trackId}.json`).then(res => res.json()))
+}
+
+export function loadTrackLod(trackId, count = 100) {
+  // Level-of-detail tiers (100 / 500 / 2000 / 'full' points) share station
+  // distances with the full track; small tiers suit the minimap and far views
+  return fetch(`/tracks/${trackId}.lod${count}.bin`)
+    .then(res => {
+      if (!res.ok) throw new Error(`No LOD ${count} for ${trackId}`)
+      return res.arrayBuffer()
+    })
+    .then(parseTrackBinary)
+}